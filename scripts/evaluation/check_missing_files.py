@@ -5,48 +5,497 @@ This helps identify which sensor data files are missing before running training/
 """
 
 import argparse
+import hashlib
+import io
+import json
 import logging
+import mmap
+import os
+import queue
+import stat
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
 import pickle
 import lzma
 from tqdm import tqdm
 
+try:
+    import zstandard
+except ImportError:  # zstd re-encoded logs are optional
+    zstandard = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Below this many logs, spawning worker processes costs more than it saves
+MIN_LOGS_FOR_PROCESS_POOL = 4
 
-def check_file_exists(file_path: Path) -> bool:
-    """Check if a file exists."""
-    return file_path.exists() and file_path.is_file()
+# Number of sensor paths checked per batch, and threads used to stat a batch
+CHECK_BATCH_SIZE = 256
+STAT_THREADS = 16
 
+# Shared default for scenes without camera data
+_EMPTY_CAMS: Dict[str, Dict] = {}
 
-def load_scene_data(data_path: Path, log_name: str) -> List[Dict]:
-    """Load scene data from a log file."""
-    log_file = data_path / f"{log_name}.pkl"
+# Marks the end of a prefetched stream
+_PREFETCH_DONE = object()
+
+
+class LogReadError(Exception):
+    """Raised by iter_scene_data(strict=True) when a log cannot be decoded."""
+
+
+def check_file_exists(file_path: Union[str, Path]) -> bool:
+    """Check if a file exists, using a single stat call."""
+    try:
+        return stat.S_ISREG(os.stat(file_path).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def _index_sensor_tree(root: Union[str, Path]) -> Set[str]:
+    """
+    List all files below a directory with a single scandir walk.
+    
+    scandir returns the entry type with the directory listing, so no per-file
+    stat is needed to build the index.
+    
+    Returns:
+        Set of file paths relative to root, using "/" as separator
+    """
+    index = set()
+    stack = [("", os.fspath(root))]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel_path = rel_dir + entry.name
+                    if entry.is_dir():
+                        stack.append((rel_path + "/", entry.path))
+                    elif entry.is_file():
+                        index.add(rel_path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Failed to list directory {abs_dir}: {e}")
+    return index
+
+
+def _get_sensor_index(sensor_root: str, top_dir: str, index_cache: Optional[Dict[str, Set[str]]] = None) -> Set[str]:
+    """Get the index of a top-level sensor directory, building it on first access to index_cache."""
+    if index_cache is None:
+        return _index_sensor_tree(sensor_root + top_dir)
+    index = index_cache.get(top_dir)
+    if index is None:
+        index = _index_sensor_tree(sensor_root + top_dir)
+        index_cache[top_dir] = index
+    return index
+
+
+def find_missing_sensor_files(sensor_root: str, rel_paths: List[str], index_cache: Optional[Dict[str, Set[str]]] = None) -> Set[str]:
+    """
+    Find the sensor files of a batch that do not exist, using the directory index.
+    
+    Paths are grouped by top-level directory and each group is resolved against
+    its index with one set difference, instead of one lookup call per path.
+    
+    Args:
+        sensor_root: Sensor blobs path as a string ending with a path separator
+        rel_paths: Paths of the sensor files relative to the sensor blobs path
+        index_cache: Indexes of the top-level directories already built for this sensor
+            root, reused and extended across calls. If None, directories are re-indexed.
+    
+    Returns:
+        Set of the relative paths that do not exist
+    """
+    missing = set()
+    sub_paths_by_dir: Dict[str, Set[str]] = {}
+    for rel_path in rel_paths:
+        top_dir, _, sub_path = rel_path.partition("/")
+        if sub_path:
+            sub_paths_by_dir.setdefault(top_dir, set()).add(sub_path)
+        elif not check_file_exists(sensor_root + rel_path):
+            missing.add(rel_path)
+    
+    for top_dir, sub_paths in sub_paths_by_dir.items():
+        prefix = top_dir + "/"
+        missing.update(prefix + sub_path for sub_path in sub_paths.difference(_get_sensor_index(sensor_root, top_dir, index_cache)))
+    return missing
+
+
+@contextmanager
+def _open_log_file(log_file: Path):
+    """
+    Open a compressed log file as a decoded binary stream.
+    
+    The compressed file is memory-mapped, so the decoder reads straight from the
+    page cache and the kernel can read ahead sequentially.
+    """
+    with open(log_file, "rb") as raw, mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        
+        if log_file.suffix == ".zst":
+            reader = zstandard.ZstdDecompressor().stream_reader(mapped, closefd=False)
+            # Unpickler needs readline(), which the raw zstd reader does not implement
+            stream = io.BufferedReader(reader, buffer_size=1 << 20)
+        else:
+            stream = lzma.open(mapped, "rb")
+        
+        with stream:
+            yield stream
+
+
+def default_zstd_path(data_path: Path) -> Path:
+    """
+    Get the default directory of the zstd log copies: a sibling ``<data_path>_zstd``.
+    
+    The copies must not live in the navsim log directory itself, since SceneLoader
+    unpickles every file it finds there.
+    """
+    return data_path.with_name(f"{data_path.name}_zstd")
+
+
+def _resolve_log_file(data_path: Path, log_name: str, zstd_path: Optional[Path] = None) -> Path:
+    """
+    Get the log file to read, preferring a zstd re-encoded copy in zstd_path if it can be decoded.
+    
+    The copy is only used while it is at least as new as the original log, so a
+    re-downloaded log is not shadowed by a stale copy.
+    """
+    pkl_file = data_path / f"{log_name}.pkl"
+    if zstandard is None or zstd_path is None:
+        return pkl_file
+    zst_file = zstd_path / f"{log_name}.pkl.zst"
+    try:
+        zst_mtime = zst_file.stat().st_mtime_ns
+    except OSError:
+        return pkl_file
+    try:
+        if pkl_file.stat().st_mtime_ns > zst_mtime:
+            return pkl_file
+    except OSError:
+        pass
+    return zst_file
+
+
+def iter_scene_data(data_path: Path, log_name: str, strict: bool = False, zstd_path: Optional[Path] = None) -> Iterator[Dict]:
+    """
+    Iterate over the scene data of a log file.
+    
+    The compressed stream is decoded incrementally and unpickled record by record.
+    A record holding a list of scenes (the navsim log format) is expanded; files
+    written as one pickled record per scene are streamed one scene at a time.
+    
+    A zstd re-encoded copy (``<log_name>.pkl.zst`` in zstd_path, see
+    convert_logs_to_zstd.py) is preferred when present, not older than the log and
+    the zstandard package is installed, since it decodes several times faster than LZMA.
+    
+    A decode error ends the iteration. With strict, it is raised as LogReadError
+    after the scenes decoded so far, so callers can tell a partial log from a
+    complete one.
+    """
+    log_file = _resolve_log_file(data_path, log_name, zstd_path)
     if not log_file.exists():
         logger.error(f"Log file not found: {log_file}")
-        return []
+        return
     
     try:
-        with lzma.open(log_file, "rb") as f:
-            scenes_data = pickle.load(f)
-        return scenes_data
+        with _open_log_file(log_file) as f:
+            unpickler = pickle.Unpickler(f)
+            # Stop only at a record boundary; EOFError inside a record means the
+            # log is truncated and is handled as a decode error below
+            while f.peek(1):
+                record = unpickler.load()
+                if isinstance(record, list):
+                    yield from record
+                else:
+                    yield record
     except Exception as e:
         logger.error(f"Failed to load log file {log_file}: {e}")
-        return []
+        if strict:
+            raise LogReadError(f"Failed to load log file {log_file}: {e}") from e
+
+
+def load_scene_data(data_path: Path, log_name: str, zstd_path: Optional[Path] = None) -> List[Dict]:
+    """Load scene data from a log file."""
+    return list(iter_scene_data(data_path, log_name, zstd_path=zstd_path))
+
+
+def _prefetch(iterable: Iterable, chunk_size: int = 256, max_chunks: int = 2) -> Iterator:
+    """
+    Iterate over an iterable while a background thread produces the next items.
+    
+    Used to overlap decoding a log (the LZMA/zstd decoders release the GIL) with
+    checking the scenes that were already decoded. At most max_chunks chunks of
+    chunk_size items are buffered.
+    """
+    chunks = queue.Queue(maxsize=max_chunks)
+    stop = threading.Event()
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def produce():
+        iterator = iter(iterable)
+        chunk = []
+        error = None
+        try:
+            for item in iterator:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    put(chunk)
+                    chunk = []
+                    if stop.is_set():
+                        break
+        except Exception as e:
+            error = e
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+        # Items produced before an error are handed over before the error itself
+        if chunk:
+            put(chunk)
+        if error is not None:
+            put(error)
+        put(_PREFETCH_DONE)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _PREFETCH_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def _scan_cache_file(cache_dir: Path, log_name: str, data_path: Path, sensor_blobs_path: Path, max_scenes_per_log: int = None, zstd_path: Path = None) -> Optional[Path]:
+    """
+    Get the cache file for the scan result of a log.
+    
+    The file name is keyed by the modification time of the log file and by a
+    fingerprint of the sensor root: its path and the modification times of the
+    root, the log's sensor folder and that folder's sensor subdirectories. Any
+    change to these produces a new key, which invalidates the cached result.
+    
+    Returns:
+        Path of the cache file, or None if the log file does not exist
+    """
+    log_file = _resolve_log_file(data_path, log_name, zstd_path)
+    try:
+        key_parts = [str(log_file), str(log_file.stat().st_mtime_ns), os.path.abspath(sensor_blobs_path), str(max_scenes_per_log)]
+    except OSError:
+        return None
+    
+    log_sensor_dir = sensor_blobs_path / log_name
+    fingerprint_dirs = [sensor_blobs_path, log_sensor_dir]
+    if log_sensor_dir.is_dir():
+        fingerprint_dirs.extend(sorted(entry.path for entry in os.scandir(log_sensor_dir) if entry.is_dir()))
+    for directory in fingerprint_dirs:
+        try:
+            key_parts.append(f"{directory}:{os.stat(directory).st_mtime_ns}")
+        except OSError:
+            key_parts.append(f"{directory}:missing")
+    
+    key = hashlib.blake2b("|".join(key_parts).encode(), digest_size=16).hexdigest()
+    return cache_dir / f"{log_name}.{key}.json"
+
 
+def _scan_one_log(log_name: str, data_path: Path, sensor_blobs_path: Path, max_scenes_per_log: int = None, use_index: bool = True, cache_dir: Path = None, zstd_path: Path = None) -> Dict[str, List[str]]:
+    """
+    Check a single log for missing sensor data files.
+    
+    Kept at module level so it can be submitted to a process pool. If cache_dir
+    is given, the result is cached on disk and reused while the log and the
+    sensor folders are unchanged.
+    
+    Returns:
+        Dictionary with the missing file information of this log
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = _scan_cache_file(cache_dir, log_name, data_path, sensor_blobs_path, max_scenes_per_log, zstd_path)
+        if cache_file is not None and cache_file.exists():
+            try:
+                with open(cache_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable scan cache {cache_file}: {e}")
+    
+    missing_files = _scan_log_files(log_name, data_path, sensor_blobs_path, max_scenes_per_log, use_index, zstd_path)
+    
+    # Only cache complete scans of logs that could be read
+    if cache_file is not None and not missing_files['logs_not_found']:
+        try:
+            for stale_file in cache_dir.glob(f"{log_name}.*.json"):
+                stale_file.unlink()
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(missing_files, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to write scan cache {cache_file}: {e}")
+    
+    return missing_files
 
-def check_missing_files(data_path: Path, sensor_blobs_path: Path, log_names: List[str] = None, max_scenes_per_log: int = None) -> Dict[str, List[str]]:
+
+def _scan_log_files(log_name: str, data_path: Path, sensor_blobs_path: Path, max_scenes_per_log: int = None, use_index: bool = True, zstd_path: Path = None) -> Dict[str, List[str]]:
+    """
+    Scan a single log for missing sensor data files.
+    
+    The remainder of a scene that does not have the expected format is skipped. Sensor
+    paths are collected and checked in batches of CHECK_BATCH_SIZE; without the
+    directory index, the stat calls of a batch run concurrently on a thread pool.
+    
+    Returns:
+        Dictionary with the missing file information of this log
+    """
+    missing_files = {
+        'lidar': [],
+        'cameras': [],
+        'logs_not_found': []
+    }
+    
+    stat_pool = None if use_index else ThreadPoolExecutor(max_workers=STAT_THREADS)
+    # Directory indexes are only kept while this log is scanned, so a worker does
+    # not accumulate the indexes of every log it has processed
+    sensor_index = {}
+    
+    # Sensor paths are built by string concatenation instead of pathlib joins
+    sensor_root = os.fspath(sensor_blobs_path).rstrip(os.sep) + os.sep
+    
+    def file_exists(rel_path: str) -> bool:
+        return check_file_exists(sensor_root + rel_path)
+    
+    # Pending (kind, relative path) checks of the current batch. Scenes of a log
+    # overlap, so each path is only checked (and reported) once per log.
+    pending = []
+    seen = set()
+    
+    def flush_pending():
+        rel_paths = [rel_path for _, rel_path in pending]
+        if use_index:
+            missing = find_missing_sensor_files(sensor_root, rel_paths, sensor_index)
+        else:
+            missing = {
+                rel_path for rel_path, found in zip(rel_paths, stat_pool.map(file_exists, rel_paths)) if not found
+            }
+        if missing:
+            for kind, rel_path in pending:
+                if rel_path in missing:
+                    missing_files[kind].append(sensor_root + rel_path)
+        pending.clear()
+    
+    scenes_data = iter_scene_data(data_path, log_name, strict=True, zstd_path=zstd_path)
+    
+    # Limit scenes for quick testing
+    if max_scenes_per_log:
+        scenes_data = islice(scenes_data, max_scenes_per_log)
+    
+    scene_iter = _prefetch(scenes_data)
+    try:
+        # Bind hot-loop lookups to locals
+        seen_add = seen.add
+        pending_append = pending.append
+        empty_cams = _EMPTY_CAMS
+        batch_size = CHECK_BATCH_SIZE
+        
+        num_scenes = 0
+        log_read_failed = False
+        
+        def skip_scene():
+            logger.warning(f"Unexpected format of scene {num_scenes - 1} in log {log_name}, skipping the rest of it")
+        
+        try:
+            for scene_dict in scene_iter:
+                num_scenes += 1
+                # Scenes are type-checked as they are read (exact types, as
+                # produced by pickle), so a malformed scene does not need a
+                # separate validation pass
+                if type(scene_dict) is not dict:
+                    skip_scene()
+                    continue
+                
+                # Check lidar file
+                lidar_path = scene_dict.get('lidar_path')
+                if lidar_path:
+                    if type(lidar_path) is not str:
+                        skip_scene()
+                        continue
+                    if lidar_path not in seen:
+                        seen_add(lidar_path)
+                        pending_append(('lidar', lidar_path))
+                
+                # Check camera files
+                cams = scene_dict.get('cams', empty_cams)
+                if type(cams) is not dict:
+                    skip_scene()
+                    continue
+                for cam_data in cams.values():
+                    if type(cam_data) is not dict:
+                        skip_scene()
+                        break
+                    cam_path = cam_data.get('data_path')
+                    if cam_path:
+                        if type(cam_path) is not str:
+                            skip_scene()
+                            break
+                        if cam_path not in seen:
+                            seen_add(cam_path)
+                            pending_append(('cameras', cam_path))
+                
+                if len(pending) >= batch_size:
+                    flush_pending()
+        except LogReadError:
+            # Keep what was decoded before the failure, but report the log as
+            # unreadable so that the partial result is not cached as complete
+            log_read_failed = True
+        
+        if log_read_failed or num_scenes == 0:
+            missing_files['logs_not_found'].append(log_name)
+        
+        flush_pending()
+    finally:
+        scene_iter.close()
+        if stat_pool is not None:
+            stat_pool.shutdown()
+    
+    return missing_files
+
+
+def check_missing_files(data_path: Path, sensor_blobs_path: Path, log_names: List[str] = None, max_scenes_per_log: int = None, num_workers: int = None, use_index: bool = True, cache_dir: Path = None, zstd_path: Path = None) -> Dict[str, List[str]]:
     """
     Check for missing sensor data files in the dataset.
     
+    Logs are scanned in parallel, one task per log. A process pool is used so that
+    LZMA decompression scales across cores; small jobs fall back to a thread pool.
+    
     Args:
         data_path: Path to the navsim log data
         sensor_blobs_path: Path to the sensor blobs data
         log_names: List of log names to check. If None, check all logs.
         max_scenes_per_log: Maximum number of scenes to check per log (for quick testing)
+        num_workers: Number of parallel workers. If None, use all available cores.
+        use_index: Index sensor directories with scandir instead of stat-ing every file
+        cache_dir: Directory for per-log scan results reused by later runs. If None, no cache is used.
+        zstd_path: Directory of zstd log copies written by convert_logs_to_zstd.py. If None, only the LZMA logs are read.
     
     Returns:
         Dictionary with missing file information
@@ -59,47 +508,97 @@ def check_missing_files(data_path: Path, sensor_blobs_path: Path, log_names: Lis
     }
     
     # Get log files to process
+    if zstd_path is not None:
+        zstd_path = Path(zstd_path)
+    
     if log_names is None:
-        log_files = [f.stem for f in data_path.glob("*.pkl")]
+        log_files = {f.stem for f in data_path.glob("*.pkl")}
+        if zstd_path is not None:
+            log_files.update(f.name[:-len(".pkl.zst")] for f in zstd_path.glob("*.pkl.zst"))
+        log_files = sorted(log_files)
     else:
         log_files = log_names
     
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    
     logger.info(f"Checking {len(log_files)} log files for missing sensor data...")
     
-    for log_name in tqdm(log_files, desc="Checking logs"):
-        scenes_data = load_scene_data(data_path, log_name)
-        
-        if not scenes_data:
-            missing_files['logs_not_found'].append(log_name)
-            continue
-        
-        # Limit scenes for quick testing
-        if max_scenes_per_log:
-            scenes_data = scenes_data[:max_scenes_per_log]
-        
-        for scene_idx, scene_dict in enumerate(scenes_data):
-            try:
-                # Check lidar file
-                if 'lidar_path' in scene_dict:
-                    lidar_path = sensor_blobs_path / scene_dict['lidar_path']
-                    if not check_file_exists(lidar_path):
-                        missing_files['lidar'].append(str(lidar_path))
-                
-                # Check camera files
-                if 'cams' in scene_dict:
-                    for cam_name, cam_data in scene_dict['cams'].items():
-                        if 'data_path' in cam_data:
-                            cam_path = sensor_blobs_path / cam_data['data_path']
-                            if not check_file_exists(cam_path):
-                                missing_files['cameras'].append(str(cam_path))
-                                
-            except Exception as e:
-                logger.warning(f"Error checking scene {scene_idx} in log {log_name}: {e}")
-                continue
+    if len(log_files) < MIN_LOGS_FOR_PROCESS_POOL or num_workers <= 1:
+        executor_cls = ThreadPoolExecutor
+    else:
+        executor_cls = ProcessPoolExecutor
+    
+    # Collect per-log results first so the merged report keeps the log order
+    log_results = {}
+    with executor_cls(max_workers=max(1, num_workers)) as executor:
+        futures = {
+            executor.submit(_scan_one_log, log_name, data_path, sensor_blobs_path, max_scenes_per_log, use_index, cache_dir, zstd_path): log_name
+            for log_name in log_files
+        }
+        with tqdm(total=len(log_files), desc="Checking logs") as pbar:
+            for future in as_completed(futures):
+                log_name = futures[future]
+                try:
+                    log_results[log_name] = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to check log {log_name}: {e}")
+                    log_results[log_name] = {'lidar': [], 'cameras': [], 'logs_not_found': [log_name]}
+                pbar.update(1)
+    
+    for log_name in log_files:
+        for key, paths in log_results[log_name].items():
+            missing_files[key].extend(paths)
     
     return missing_files
 
 
+def format_report(missing_files: Dict[str, List[str]], max_listed: int = 100) -> str:
+    """
+    Format the detailed missing files report.
+    
+    The report is built as a single string so it can be written with one call.
+    
+    Args:
+        missing_files: Missing file information as returned by check_missing_files
+        max_listed: Maximum number of lidar and camera files listed in the report
+    
+    Returns:
+        Report text
+    """
+    lines = [
+        "Missing Files Report",
+        "===================",
+        "",
+        "Summary:",
+        f"  - Missing lidar files: {len(missing_files['lidar'])}",
+        f"  - Missing camera files: {len(missing_files['cameras'])}",
+        f"  - Missing log files: {len(missing_files['logs_not_found'])}",
+        "",
+    ]
+    
+    if missing_files['logs_not_found']:
+        lines.append("Missing Log Files:")
+        lines.extend(f"  {log_name}" for log_name in missing_files['logs_not_found'])
+        lines.append("")
+    
+    for key, title in (('lidar', "Missing Lidar Files:"), ('cameras', "Missing Camera Files:")):
+        file_paths = missing_files[key]
+        if not file_paths:
+            continue
+        lines.append(title)
+        lines.extend(f"  {file_path}" for file_path in file_paths[:max_listed])
+        if len(file_paths) > max_listed:
+            lines.append(f"  ... and {len(file_paths) - max_listed} more")
+        lines.append("")
+    
+    return "\n".join(lines) + "\n"
+
+
 def main():
     parser = argparse.ArgumentParser(description="Check for missing data files in navsim dataset")
     parser.add_argument("--data_path", type=str, required=True, 
@@ -110,6 +609,14 @@ def main():
                        help="Specific log names to check (without .pkl extension)")
     parser.add_argument("--max_scenes_per_log", type=int, default=None,
                        help="Maximum number of scenes to check per log (for quick testing)")
+    parser.add_argument("--num_workers", type=int, default=None,
+                       help="Number of parallel workers (default: number of CPU cores)")
+    parser.add_argument("--no_index", action="store_true",
+                       help="Stat each file instead of indexing sensor directories (faster for small spot checks)")
+    parser.add_argument("--cache_dir", type=str, default=None,
+                       help="Cache per-log results here and skip logs whose data did not change since the last run")
+    parser.add_argument("--zstd_path", type=str, default=None,
+                       help="Directory of the zstd log copies from convert_logs_to_zstd.py (default: <data_path>_zstd)")
     parser.add_argument("--output_file", type=str, default="missing_files_report.txt",
                        help="Output file for missing files report")
     
@@ -131,7 +638,11 @@ def main():
         data_path=data_path,
         sensor_blobs_path=sensor_blobs_path,
         log_names=args.log_names,
-        max_scenes_per_log=args.max_scenes_per_log
+        max_scenes_per_log=args.max_scenes_per_log,
+        num_workers=args.num_workers,
+        use_index=not args.no_index,
+        cache_dir=args.cache_dir,
+        zstd_path=Path(args.zstd_path) if args.zstd_path else default_zstd_path(data_path)
     )
     
     # Report results
@@ -145,36 +656,8 @@ def main():
     logger.info(f"  - Missing log files: {total_missing_logs}")
     
     # Save detailed report
-    with open(args.output_file, 'w') as f:
-        f.write("Missing Files Report\n")
-        f.write("===================\n\n")
-        
-        f.write(f"Summary:\n")
-        f.write(f"  - Missing lidar files: {total_missing_lidar}\n")
-        f.write(f"  - Missing camera files: {total_missing_cameras}\n")
-        f.write(f"  - Missing log files: {total_missing_logs}\n\n")
-        
-        if missing_files['logs_not_found']:
-            f.write("Missing Log Files:\n")
-            for log_name in missing_files['logs_not_found']:
-                f.write(f"  {log_name}\n")
-            f.write("\n")
-        
-        if missing_files['lidar']:
-            f.write("Missing Lidar Files:\n")
-            for file_path in missing_files['lidar'][:100]:  # Limit to first 100
-                f.write(f"  {file_path}\n")
-            if len(missing_files['lidar']) > 100:
-                f.write(f"  ... and {len(missing_files['lidar']) - 100} more\n")
-            f.write("\n")
-        
-        if missing_files['cameras']:
-            f.write("Missing Camera Files:\n")
-            for file_path in missing_files['cameras'][:100]:  # Limit to first 100
-                f.write(f"  {file_path}\n")
-            if len(missing_files['cameras']) > 100:
-                f.write(f"  ... and {len(missing_files['cameras']) - 100} more\n")
-            f.write("\n")
+    with open(args.output_file, 'w', buffering=1 << 20) as f:
+        f.write(format_report(missing_files))
     
     logger.info(f"Detailed report saved to: {args.output_file}")
     
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script to re-encode navsim log files from LZMA to zstd.
+The zstd copies (<log_name>.pkl.zst) decode several times faster and are picked up
+by check_missing_files.py (see --zstd_path). The original .pkl files are left untouched.
+The copies are written to a separate directory, <data_path>_zstd by default: SceneLoader
+unpickles every file in the log directory and would fail on them.
+"""
+
+import argparse
+import logging
+import lzma
+import os
+import pickle
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def convert_log(log_file: Path, output_path: Path, level: int = 10, overwrite: bool = False) -> bool:
+    """
+    Convert a single LZMA log file to zstd.
+
+    Scenes are written as one pickled record each, so readers can stream the log
+    scene by scene instead of loading it as a whole.
+
+    Args:
+        log_file: Path to the LZMA compressed log file
+        output_path: Directory for the zstd compressed log file
+        level: zstd compression level
+        overwrite: Re-encode even if an up-to-date output file already exists
+
+    Returns:
+        True if the log was converted, False if it was skipped or failed
+    """
+    import zstandard
+
+    zst_file = output_path / f"{log_file.name}.zst"
+    if not overwrite:
+        try:
+            # A copy older than the log (e.g. after a re-download) is re-encoded
+            is_current = zst_file.stat().st_mtime_ns >= log_file.stat().st_mtime_ns
+        except OSError:
+            is_current = False
+        if is_current:
+            logger.debug(f"Skipping already converted log: {zst_file}")
+            return False
+
+    try:
+        with lzma.open(log_file, "rb") as f:
+            scenes_data = pickle.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load log file {log_file}: {e}")
+        return False
+
+    # Write to a temporary file first so an interrupted run leaves no partial log
+    tmp_file = zst_file.with_name(zst_file.name + ".tmp")
+    compressor = zstandard.ZstdCompressor(level=level)
+    with open(tmp_file, "wb") as raw, compressor.stream_writer(raw) as writer:
+        for scene_dict in scenes_data:
+            pickle.dump(scene_dict, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, zst_file)
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode navsim log files from LZMA to zstd")
+    parser.add_argument("--data_path", type=str, required=True,
+                       help="Path to navsim log data directory")
+    parser.add_argument("--output_path", type=str, default=None,
+                       help="Output directory for the zstd logs, separate from data_path (default: <data_path>_zstd)")
+    parser.add_argument("--log_names", type=str, nargs="+", default=None,
+                       help="Specific log names to convert (without .pkl extension)")
+    parser.add_argument("--level", type=int, default=10,
+                       help="zstd compression level")
+    parser.add_argument("--overwrite", action="store_true",
+                       help="Re-encode logs that were already converted, even if the copy is up to date")
+
+    args = parser.parse_args()
+
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        logger.error("The zstandard package is required: pip install zstandard")
+        return
+
+    data_path = Path(args.data_path)
+    # Same default as check_missing_files.py --zstd_path
+    output_path = Path(args.output_path) if args.output_path else data_path.with_name(f"{data_path.name}_zstd")
+
+    if not data_path.exists():
+        logger.error(f"Data path does not exist: {data_path}")
+        return
+
+    if output_path.resolve() == data_path.resolve():
+        logger.error("The output path must differ from the data path: SceneLoader loads every file in the log directory")
+        return
+
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    if args.log_names is None:
+        log_files = sorted(data_path.glob("*.pkl"))
+    else:
+        log_files = [data_path / f"{log_name}.pkl" for log_name in args.log_names]
+
+    logger.info(f"Converting {len(log_files)} log files to zstd...")
+
+    num_converted = 0
+    for log_file in tqdm(log_files, desc="Converting logs"):
+        if convert_log(log_file, output_path, level=args.level, overwrite=args.overwrite):
+            num_converted += 1
+
+    logger.info(f"Converted {num_converted} of {len(log_files)} log files to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
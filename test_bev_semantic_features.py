@@ -11,6 +11,10 @@ import sys
 import logging
 from pathlib import Path
 
+# Headless test: select the Agg backend before anything imports pyplot
+import matplotlib
+matplotlib.use('Agg')
+
 # Add project root to path to enable absolute imports
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
@@ -73,13 +77,17 @@ def test_bev_semantic_features():
         test_scene = random_scenes[0]
         print(f"✅ 选择测试场景: {test_scene[:12]}...")
         
+        # Create the output directory once for all test artifacts
+        test_output_dir = Path("./test_output")
+        test_output_dir.mkdir(parents=True, exist_ok=True)
+        
         # Predict trajectory with features
         print("\n🔮 进行轨迹预测和特征提取...")
         result = app.predict_single_scene(
             scene_token=test_scene,
             time_window=(0, 3.0),
             save_visualization=True,
-            output_dir="./test_output"
+            output_dir=str(test_output_dir)
         )
         print("✅ 轨迹预测完成")
         
@@ -122,10 +130,8 @@ def test_bev_semantic_features():
             )
             
             # Save the semantic visualization
-            test_output_dir = Path("./test_output")
-            test_output_dir.mkdir(exist_ok=True)
             semantic_save_path = test_output_dir / f"test_bev_semantic_{test_scene[:8]}.png"
-            fig_semantic.savefig(semantic_save_path, dpi=300, bbox_inches='tight')
+            fig_semantic.savefig(semantic_save_path, dpi=150, bbox_inches='tight', pil_kwargs={'compress_level': 1})
             print(f"  💾 语义分割图已保存: {semantic_save_path}")
             
             # Test comprehensive feature view
@@ -138,13 +144,15 @@ def test_bev_semantic_features():
             
             # Display basic statistics
             predictions = semantic_data["predictions"]
-            unique_classes, counts = np.unique(predictions, return_counts=True)
-            total_pixels = np.sum(counts)
+            num_classes = max(feature_viz.bev_semantic_classes) + 1
+            counts = np.bincount(np.ravel(predictions).astype(np.int64), minlength=num_classes)
+            total_pixels = np.size(predictions)
             
             print(f"\n📊 语义分割统计:")
-            for class_id, count in zip(unique_classes, counts):
+            for class_id in np.flatnonzero(counts[:num_classes]):
                 if class_id in feature_viz.bev_semantic_classes:
                     class_info = feature_viz.bev_semantic_classes[class_id]
+                    count = counts[class_id]
                     percentage = (count / total_pixels) * 100
                     print(f"    {class_info['name']} (ID {class_id}): {count:,} 像素 ({percentage:.1f}%)")
             
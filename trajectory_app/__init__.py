@@ -4,10 +4,16 @@ Trajectory Prediction Application
 A complete application for trajectory prediction and visualization using DiffusionDrive and other models.
 """
 
-from .app import TrajectoryPredictionApp
-from .inference_engine import TrajectoryInferenceEngine
-from .data_manager import TrajectoryDataManager
-from .visualizer import TrajectoryVisualizer
+import importlib
+
+# Submodules are imported on first attribute access (PEP 562), so importing the
+# package does not pull in torch, navsim and matplotlib up front
+_LAZY_ATTRIBUTES = {
+    "TrajectoryPredictionApp": ".app",
+    "TrajectoryInferenceEngine": ".inference_engine",
+    "TrajectoryDataManager": ".data_manager",
+    "TrajectoryVisualizer": ".visualizer",
+}
 
 __version__ = "1.0.0"
 __author__ = "NavSim Team"
@@ -17,4 +23,16 @@ __all__ = [
     "TrajectoryInferenceEngine", 
     "TrajectoryDataManager",
     "TrajectoryVisualizer"
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -4,19 +4,154 @@ Trajectory Prediction Application
 Main application class that coordinates inference, data management, and visualization.
 """
 
+import copy
+import io
+import json
 import logging
+import multiprocessing
+import queue
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
 import yaml
 import os
 
-from .inference_engine import TrajectoryInferenceEngine
-from .data_manager import TrajectoryDataManager
-from .visualizer import TrajectoryVisualizer
+# Prefer the libyaml bindings, they are much faster than the pure Python implementation
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# orjson is optional, it writes JSON batch summaries faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The components import torch, navsim and matplotlib, which take seconds to import.
+# They are imported when the application (or the visualizer) is first created.
+if TYPE_CHECKING:
+    from .visualizer import TrajectoryVisualizer
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of the scene stream between batch pipeline stages
+_END_OF_SCENES = object()
+
+# Parsed configuration files, keyed by their text after environment variable expansion
+_CONFIG_CACHE: Dict[str, Dict[str, Any]] = {}
+
+# File name of a saved scene visualization; suffix marks feature-enhanced views and
+# time_tag is "_t<end>s" for views of a specific time window (e.g. in demos)
+_SCENE_PNG_TEMPLATE = "scene_{token:.12}_prediction{suffix}{time_tag}.png"
+
+# Visualizer of a render worker process, created by _init_render_worker
+_WORKER_VISUALIZER = None
+
+
+def _render_figure(
+    visualizer: "TrajectoryVisualizer",
+    scene_data: Dict[str, Any],
+    synchronized_trajectories: Dict[str, Any],
+    extracted_features: Dict[str, Any],
+    time_window: Tuple[float, float],
+    save_path: Optional[Path]
+):
+    """
+    Render the comprehensive view of a scene, with features if BEV semantic features are available
+    """
+    if "bev_semantic_map" in extracted_features:
+        fig = visualizer.create_comprehensive_view_with_features(
+            scene_data, 
+            synchronized_trajectories,
+            extracted_features=extracted_features,
+            time_window=time_window,
+            save_path=save_path
+        )
+        logger.info("Created feature-enhanced visualization with %d feature types", len(extracted_features))
+    else:
+        fig = visualizer.create_comprehensive_view(
+            scene_data, 
+            synchronized_trajectories, 
+            time_window=time_window,
+            save_path=save_path
+        )
+    return fig
+
+
+def _init_render_worker(viz_config: Dict[str, Any], log_level: str):
+    """Create the visualizer of a render worker process"""
+    global _WORKER_VISUALIZER
+    logging.basicConfig(
+        level=getattr(logging, log_level.upper()),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+    from .visualizer import TrajectoryVisualizer
+    _WORKER_VISUALIZER = TrajectoryVisualizer(viz_config)
+
+
+def _close_figure(fig):
+    """Release a figure from pyplot's figure registry, freeing its canvas buffers"""
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
+
+def _render_figure_in_worker(*render_args):
+    """Render and save a figure in a render worker process"""
+    _close_figure(_render_figure(_WORKER_VISUALIZER, *render_args))
+
+
+# Application of a scene worker process, created by _init_scene_worker
+_WORKER_APP = None
+
+
+def _init_scene_worker(config: Dict[str, Any], worker_ids):
+    """Create the application of a scene worker process, on its round-robin GPU"""
+    global _WORKER_APP
+    worker_id = worker_ids.get()
+    import torch
+    if torch.cuda.is_available():
+        torch.cuda.set_device(worker_id % torch.cuda.device_count())
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+    _WORKER_APP = TrajectoryPredictionApp(config)
+
+
+def _run_scene(
+    scene_token: str,
+    time_window: Tuple[float, float],
+    output_dir: Path,
+    return_result: bool,
+    render_visualization: bool
+) -> Dict[str, Any]:
+    """
+    Load, predict and render a scene in a scene worker process
+    
+    Returns:
+        Prediction result without the figure, or only its compact scene record
+    """
+    start_time = time.time()
+    scene_inputs = _WORKER_APP._load_scene_inputs(scene_token)
+    result = _WORKER_APP._build_scene_result(
+        scene_inputs,
+        _WORKER_APP._run_inference(scene_inputs),
+        time_window=time_window,
+        save_visualization=render_visualization,
+        output_dir=output_dir,
+        start_time=start_time,
+        render=render_visualization,
+        create_output_dir=False,
+        return_figure=False
+    )
+    return result if return_result else _WORKER_APP._compact_result(result)
+
 
 class TrajectoryPredictionApp:
     """
@@ -43,7 +178,15 @@ class TrajectoryPredictionApp:
         # Initialize components
         self.inference_engine = None
         self.data_manager = None
-        self.visualizer = None
+        
+        # Recently loaded scene inputs, reused when a scene is processed again
+        # (e.g. once per time window in create_demo_visualization)
+        self._scene_cache = OrderedDict()
+        self._scene_cache_size = self.config.get("app", {}).get("scene_cache_size", 8)
+        self._scene_cache_lock = threading.Lock()
+        
+        # Random generator for scene sampling (app.random_seed makes it reproducible)
+        self._rng = np.random.default_rng(self.config.get("app", {}).get("random_seed"))
         
         # Initialize all components
         self._initialize_components()
@@ -69,27 +212,22 @@ class TrajectoryPredictionApp:
             Configuration dictionary
         """
         config_path = Path(config_path)
-        if not config_path.exists():
+        try:
+            config_text = config_path.read_text()
+        except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
-            
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-            
-        # Expand environment variables
-        config = self._expand_env_vars(config)
         
-        return config
-    
-    def _expand_env_vars(self, obj):
-        """Recursively expand environment variables in config"""
-        if isinstance(obj, dict):
-            return {k: self._expand_env_vars(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._expand_env_vars(v) for v in obj]
-        elif isinstance(obj, str):
-            return os.path.expandvars(obj)
-        else:
-            return obj
+        # Expand environment variables in the raw text, before parsing. Values are
+        # substituted verbatim, so quote "${VAR}" in the file if a value may contain
+        # YAML syntax such as ": " or " #".
+        config_text = os.path.expandvars(config_text)
+        
+        # Reuse the parsed file while neither it nor the environment changed;
+        # callers get their own copy
+        if config_text not in _CONFIG_CACHE:
+            _CONFIG_CACHE[config_text] = yaml.load(config_text, Loader=SafeLoader)
+        
+        return copy.deepcopy(_CONFIG_CACHE[config_text])
     
     def _initialize_components(self):
         """
@@ -97,6 +235,9 @@ class TrajectoryPredictionApp:
         """
         logger.info("Initializing trajectory prediction application components...")
         
+        from .inference_engine import TrajectoryInferenceEngine
+        from .data_manager import TrajectoryDataManager
+        
         # 1. Initialize inference engine and load model
         logger.info("Loading model...")
         self.inference_engine = TrajectoryInferenceEngine(self.config["model"])
@@ -109,11 +250,7 @@ class TrajectoryPredictionApp:
             self.inference_engine
         )
         
-        # 3. Initialize visualizer
-        logger.info("Initializing visualizer...")
-        self.visualizer = TrajectoryVisualizer(
-            self.config.get("visualization", {})
-        )
+        # 3. The visualizer is created on first use (see visualizer property)
         
         # Log initialization summary
         stats = self.data_manager.get_scene_statistics()
@@ -129,7 +266,9 @@ class TrajectoryPredictionApp:
         scene_token: str, 
         time_window: Tuple[float, float] = (0, 3.0),
         save_visualization: bool = True,
-        output_dir: Optional[Path] = None
+        output_dir: Optional[Path] = None,
+        return_figure: bool = True,
+        render_visualization: bool = True
     ) -> Dict[str, Any]:
         """
         Predict trajectory for a single scene and create visualization
@@ -139,84 +278,183 @@ class TrajectoryPredictionApp:
             time_window: Time window for visualization (start, end) in seconds
             save_visualization: Whether to save visualization
             output_dir: Output directory for results
+            return_figure: Return the live matplotlib figure. If False the figure is
+                closed after saving and the result only carries its save_path.
+            render_visualization: Whether to render the visualization at all. If False
+                only the prediction and metrics are computed and nothing is saved.
             
         Returns:
             Dictionary containing prediction results and paths
         """
-        logger.info(f"Processing scene: {scene_token}")
+        logger.info("Processing scene: %s", scene_token)
         start_time = time.time()
         
+        scene_inputs = self._load_scene_inputs(scene_token)
+        prediction_result = self._run_inference(scene_inputs)
+        
+        return self._build_scene_result(
+            scene_inputs,
+            prediction_result,
+            time_window=time_window,
+            save_visualization=save_visualization and render_visualization,
+            output_dir=output_dir,
+            start_time=start_time,
+            render=render_visualization,
+            return_figure=return_figure
+        )
+    
+    @cached_property
+    def visualizer(self) -> "TrajectoryVisualizer":
+        """
+        Trajectory visualizer, created on first use so that paths which do not
+        render never import matplotlib
+        """
+        from .visualizer import TrajectoryVisualizer
+        
+        logger.info("Initializing visualizer...")
+        return TrajectoryVisualizer(self.config.get("visualization", {}))
+    
+    def _load_scene_inputs(self, scene_token: str) -> Dict[str, Any]:
+        """
+        Load everything needed to predict a scene (pipeline stage 1)
+        
+        Args:
+            scene_token: Scene token to load
+            
+        Returns:
+            Dictionary with the scene data, existing trajectories and agent input
+        """
+        with self._scene_cache_lock:
+            scene_inputs = self._scene_cache.get(scene_token)
+            if scene_inputs is not None:
+                self._scene_cache.move_to_end(scene_token)
+                logger.debug("Using cached scene data for token: %s", scene_token)
+                return scene_inputs
+        
         # 1. Load scene data
         scene_data = self.data_manager.load_scene_data(scene_token)
         
         # 2. Get existing trajectories (GT, PDM)
-        existing_trajectories = self.data_manager.get_all_trajectories(scene_token)
+        existing_trajectories = self.data_manager.get_all_trajectories(scene_token, scene_data)
         
+        scene_inputs = {
+            "scene_token": scene_token,
+            "scene_data": scene_data,
+            "existing_trajectories": existing_trajectories,
+            "agent_input": scene_data["scene"].get_agent_input()
+        }
+        
+        if self._scene_cache_size > 0:
+            with self._scene_cache_lock:
+                self._scene_cache[scene_token] = scene_inputs
+                while len(self._scene_cache) > self._scene_cache_size:
+                    self._scene_cache.popitem(last=False)
+        
+        return scene_inputs
+    
+    def _run_inference(self, scene_inputs: Dict[str, Any], stream=None) -> Dict[str, Any]:
+        """
+        Predict the trajectory of a loaded scene (pipeline stage 2)
+        """
         # 3. Predict trajectory
-        agent_input = scene_data["scene"].get_agent_input()
-        prediction_result = self.inference_engine.predict_trajectory(
-            agent_input, scene_data["scene"]
+        return self.inference_engine.predict_trajectory(
+            scene_inputs["agent_input"], scene_inputs["scene_data"]["scene"], stream
+        )
+    
+    def _run_inference_batch(self, scene_inputs_list: List[Dict[str, Any]], stream=None) -> List[Dict[str, Any]]:
+        """
+        Predict the trajectories of several loaded scenes in one forward pass
+        """
+        return self.inference_engine.predict_trajectory_batch(
+            [scene_inputs["agent_input"] for scene_inputs in scene_inputs_list],
+            [scene_inputs["scene_data"]["scene"] for scene_inputs in scene_inputs_list],
+            stream
         )
+    
+    def _build_scene_result(
+        self,
+        scene_inputs: Dict[str, Any],
+        prediction_result: Dict[str, Any],
+        time_window: Tuple[float, float],
+        save_visualization: bool,
+        output_dir: Optional[Path],
+        start_time: float,
+        render: bool = True,
+        synchronized_trajectories: Optional[Dict[str, Dict[str, Any]]] = None,
+        create_output_dir: bool = True,
+        return_figure: bool = True,
+        tag_time_window: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Synchronize trajectories, visualize and compute metrics (pipeline stage 3)
+        
+        Args:
+            scene_inputs: Output of _load_scene_inputs
+            prediction_result: Output of _run_inference
+            time_window: Time window for visualization (start, end) in seconds
+            save_visualization: Whether to save visualization
+            output_dir: Output directory for results
+            start_time: Time at which processing of the scene started
+            render: Whether to render the figure here. If False, the caller renders it
+                (see _render_args) and the result has no figure yet.
+            synchronized_trajectories: Already synchronized trajectories for time_window
+                (synchronized here if not given)
+            create_output_dir: Whether output_dir may not exist yet. Loops over many
+                scenes create it once up front and pass False.
+            return_figure: Keep the rendered figure open and return it
+            tag_time_window: Include the end of the time window in the file name, so
+                views of several windows of a scene do not overwrite each other
+            
+        Returns:
+            Dictionary containing prediction results and paths
+        """
+        scene_token = scene_inputs["scene_token"]
+        scene_data = scene_inputs["scene_data"]
         
         # 4. Combine all trajectories
-        all_trajectories = existing_trajectories.copy()
+        all_trajectories = scene_inputs["existing_trajectories"].copy()
         all_trajectories["prediction"] = prediction_result["trajectory"]
         
         # 5. Synchronize trajectories
-        synchronized_trajectories = self.data_manager.synchronize_trajectories(
-            all_trajectories, 
-            time_horizon=time_window[1] + 1.0,  # Add buffer
-            dt=0.1
-        )
+        if synchronized_trajectories is None:
+            synchronized_trajectories = self.data_manager.synchronize_trajectories(
+                all_trajectories, 
+                time_horizon=time_window[1] + 1.0,  # Add buffer
+                dt=0.1
+            )
         
         # 6. Create visualization
         extracted_features = prediction_result.get("extracted_features", {})
         
+        viz_path = None
         if save_visualization:
             output_dir = Path(output_dir) if output_dir else Path("./output")
-            output_dir.mkdir(parents=True, exist_ok=True)
+            if create_output_dir:
+                output_dir.mkdir(parents=True, exist_ok=True)
             
             # Use feature-enhanced visualization if BEV semantic features are available
-            if "bev_semantic_map" in extracted_features:
-                viz_path = output_dir / f"scene_{scene_token[:12]}_prediction_with_features.png"
-                fig = self.visualizer.create_comprehensive_view_with_features(
-                    scene_data, 
-                    synchronized_trajectories,
-                    extracted_features=extracted_features,
-                    time_window=time_window,
-                    save_path=viz_path
-                )
-                logger.info(f"Created feature-enhanced visualization with {len(extracted_features)} feature types")
-            else:
-                viz_path = output_dir / f"scene_{scene_token[:12]}_prediction.png"
-                fig = self.visualizer.create_comprehensive_view(
-                    scene_data, 
-                    synchronized_trajectories, 
-                    time_window=time_window,
-                    save_path=viz_path
-                )
-        else:
-            if "bev_semantic_map" in extracted_features:
-                fig = self.visualizer.create_comprehensive_view_with_features(
-                    scene_data, 
-                    synchronized_trajectories,
-                    extracted_features=extracted_features,
-                    time_window=time_window
-                )
-            else:
-                fig = self.visualizer.create_comprehensive_view(
-                    scene_data, 
-                    synchronized_trajectories, 
-                    time_window=time_window
-                )
-            viz_path = None
+            viz_path = output_dir / _SCENE_PNG_TEMPLATE.format(
+                token=scene_token,
+                suffix="_with_features" if "bev_semantic_map" in extracted_features else "",
+                time_tag=f"_t{time_window[1]:.1f}s" if tag_time_window else ""
+            )
+        
+        fig = None
+        if render:
+            fig = _render_figure(
+                self.visualizer, scene_data, synchronized_trajectories,
+                extracted_features, time_window, viz_path
+            )
+            if not return_figure:
+                _close_figure(fig)
+                fig = None
         
         # 7. Calculate metrics if ground truth available
         metrics = {}
-        if "ground_truth" in synchronized_trajectories and "prediction" in synchronized_trajectories:
-            gt_poses = synchronized_trajectories["ground_truth"]["poses"]
-            pred_poses = synchronized_trajectories["prediction"]["poses"]
-            metrics = self.visualizer._calculate_trajectory_metrics(gt_poses, pred_poses)
+        position_errors = synchronized_trajectories.get("prediction", {}).get("position_errors")
+        if position_errors is not None:
+            from .data_manager import calculate_trajectory_metrics
+            metrics = calculate_trajectory_metrics(position_errors)
         
         processing_time = time.time() - start_time
         
@@ -239,30 +477,123 @@ class TrajectoryPredictionApp:
             "processing_time": processing_time
         }
         
-        logger.info(f"Scene {scene_token} processed in {processing_time:.2f}s")
+        logger.info("Scene %s processed in %.2fs", scene_token, processing_time)
         if metrics:
-            logger.info(f"Metrics - ADE: {metrics['ade']:.2f}m, FDE: {metrics['fde']:.2f}m")
+            logger.info("Metrics - ADE: %.2fm, FDE: %.2fm", metrics['ade'], metrics['fde'])
         
         return result
     
+    def _create_render_pool(self, num_tasks: int) -> Optional[ProcessPoolExecutor]:
+        """
+        Create a process pool for rendering figures in parallel
+        
+        Matplotlib rendering is CPU bound and holds the GIL, so figures are rendered in
+        separate processes. Model inference stays in this process.
+        
+        Args:
+            num_tasks: Number of figures that will be rendered
+            
+        Returns:
+            Process pool, or None to render in this process
+        """
+        viz_config = self.config.get("visualization", {})
+        num_workers = min(viz_config.get("num_render_workers", 0), num_tasks)
+        if num_workers <= 1:
+            return None
+        
+        try:
+            # spawn: forking a process that holds CUDA state or a GUI backend is unsafe
+            return ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+                initargs=(viz_config, self.config.get("logging", {}).get("level", "INFO"))
+            )
+        except Exception as e:
+            logger.warning(f"Could not start render worker processes, rendering sequentially: {e}")
+            return None
+    
+    def _submit_render(
+        self,
+        render_pool: ProcessPoolExecutor,
+        scene_inputs: Dict[str, Any],
+        result: Dict[str, Any],
+        time_window: Tuple[float, float]
+    ) -> Tuple[Any, Dict[str, Any], tuple]:
+        """
+        Submit rendering of a result built with render=False to the render pool
+        
+        Returns:
+            Pending render (future, result, render arguments) for _finish_render
+        """
+        render_args = self._render_args(scene_inputs, result, time_window)
+        return render_pool.submit(_render_figure_in_worker, *render_args), result, render_args
+    
+    def _render_args(
+        self,
+        scene_inputs: Dict[str, Any],
+        result: Dict[str, Any],
+        time_window: Tuple[float, float]
+    ) -> tuple:
+        """Arguments of _render_figure (after the visualizer) for a result built with render=False"""
+        return (
+            scene_inputs["scene_data"],
+            result["trajectories"]["synchronized"],
+            result["extracted_features"],
+            time_window,
+            result["visualization"]["save_path"]
+        )
+    
+    def _finish_render(self, pending_render: Tuple[Any, Dict[str, Any], tuple]) -> Optional[Exception]:
+        """
+        Wait for a pending render, re-rendering in this process if it failed in a worker
+        
+        Args:
+            pending_render: Pending render returned by _submit_render
+            
+        Returns:
+            None if the figure was rendered, otherwise the error
+        """
+        future, result, render_args = pending_render
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning(f"Render worker failed for scene {result['scene_token']} ({e}), rendering in main process")
+            try:
+                _close_figure(_render_figure(self.visualizer, *render_args))
+            except Exception as render_error:
+                return render_error
+        return None
+    
     def predict_batch_scenes(
         self, 
         scene_tokens: List[str], 
         time_window: Tuple[float, float] = (0, 3.0),
         output_dir: Optional[Path] = None,
-        max_scenes: Optional[int] = None
+        max_scenes: Optional[int] = None,
+        return_results: bool = True,
+        render_visualization: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Predict trajectories for multiple scenes
         
+        A compact record of each processed scene (token, metadata, metrics, processing
+        time, visualization path) is appended to results.jsonl in output_dir as soon as
+        the scene is done.
+        
         Args:
             scene_tokens: List of scene tokens to process
             time_window: Time window for visualization
             output_dir: Output directory for results
             max_scenes: Maximum number of scenes to process
+            return_results: Return the full prediction results. If False, only the
+                compact scene records are kept and returned, so memory use does not
+                grow with the trajectories and features of every scene.
+            render_visualization: Whether to render and save visualizations. If False
+                only predictions and metrics are computed (e.g. for evaluation sweeps).
             
         Returns:
-            List of prediction results
+            List of prediction results (or compact scene records)
         """
         if max_scenes:
             scene_tokens = scene_tokens[:max_scenes]
@@ -275,31 +606,290 @@ class TrajectoryPredictionApp:
         results = []
         failed_scenes = []
         
-        for i, scene_token in enumerate(scene_tokens):
-            try:
-                logger.info(f"Processing scene {i+1}/{len(scene_tokens)}: {scene_token}")
-                
-                result = self.predict_single_scene(
-                    scene_token,
-                    time_window=time_window,
-                    save_visualization=True,
-                    output_dir=output_dir
-                )
-                
+        # Drop unknown tokens up front instead of failing them inside the pipeline
+        missing_tokens = [t for t in scene_tokens if not self.data_manager.has_scene(t)]
+        if missing_tokens:
+            logger.warning(f"Skipping {len(missing_tokens)} scene tokens not found in the dataset")
+            failed_scenes.extend({"token": t, "error": f"Scene token {t} not found"} for t in missing_tokens)
+            missing_token_set = set(missing_tokens)
+            scene_tokens = [t for t in scene_tokens if t not in missing_token_set]
+        
+        scene_records = []
+        
+        def record_failure(scene_token: str, error: Exception):
+            logger.error(f"Failed to process scene {scene_token}: {error}")
+            failed_scenes.append({"token": scene_token, "error": str(error)})
+        
+        def finish_result(result: Optional[Dict[str, Any]], record: Optional[Dict[str, Any]] = None):
+            if record is None:
+                record = self._compact_result(result)
+            results_file.write(json.dumps(record, default=str) + "\n")
+            scene_records.append(record)
+            if return_results:
                 results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Failed to process scene {scene_token}: {e}")
-                failed_scenes.append({"token": scene_token, "error": str(e)})
+        
+        num_scene_workers = min(self.config.get("app", {}).get("num_scene_workers", 0), len(scene_tokens))
+        # Line-buffered, so every finished scene is on disk even if the run is killed
+        with open(output_dir / "results.jsonl", "w", buffering=1) as results_file:
+            if num_scene_workers > 1:
+                self._run_batch_in_workers(
+                    scene_tokens, time_window, output_dir, num_scene_workers,
+                    return_results, render_visualization, finish_result, record_failure
+                )
+            else:
+                self._run_batch_pipeline(
+                    scene_tokens, time_window, output_dir,
+                    render_visualization, finish_result, record_failure
+                )
         
         # Create summary
-        summary = self._create_batch_summary(results, failed_scenes, output_dir)
+        summary = self._create_batch_summary(scene_records, failed_scenes, output_dir)
         
         logger.info(f"Batch processing complete!")
-        logger.info(f"Successful: {len(results)}, Failed: {len(failed_scenes)}")
+        logger.info(f"Successful: {len(scene_records)}, Failed: {len(failed_scenes)}")
         logger.info(f"Results saved to: {output_dir}")
         
-        return results
+        return results if return_results else scene_records
+    
+    def _run_batch_pipeline(
+        self,
+        scene_tokens: List[str],
+        time_window: Tuple[float, float],
+        output_dir: Path,
+        render_visualization: bool,
+        finish_result,
+        record_failure
+    ):
+        """
+        Process the scenes of a batch in this process
+        
+        Args:
+            scene_tokens: Scene tokens to process
+            time_window: Time window for visualization
+            output_dir: Output directory for results
+            render_visualization: Whether to render and save visualizations
+            finish_result: Called with the result of each processed scene
+            record_failure: Called with the token and error of each failed scene
+        """
+        # Scenes flow through a three-stage pipeline: a loader thread reads scene data,
+        # inference threads run the model on micro-batches of the scenes
+        # loaded so far (one thread by default, keeping GPU work serialized), and
+        # the calling thread renders and saves the results. Bounded queues let loading
+        # and inference of the next scenes overlap with rendering of the current one.
+        # Rendering stays on the calling thread since pyplot is not thread-safe.
+        app_config = self.config.get("app", {})
+        queue_size = app_config.get("pipeline_queue_size", 4)
+        inference_batch_size = app_config.get("inference_batch_size", 4)
+        # Each inference thread runs on its own CUDA stream, so forward passes of
+        # consecutive micro-batches can overlap on a single GPU
+        num_inference_streams = max(1, app_config.get("num_inference_streams", 1))
+        inference_queue = queue.Queue(maxsize=queue_size)
+        render_queue = queue.Queue(maxsize=queue_size)
+        stop_event = threading.Event()
+        
+        def put(target_queue: queue.Queue, item: Any):
+            # Give up once the consumer has stopped, instead of blocking forever
+            while not stop_event.is_set():
+                try:
+                    target_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        def get(source_queue: queue.Queue) -> Any:
+            # Once stopped, the producer may never send its end marker, so act as if it had
+            while not stop_event.is_set():
+                try:
+                    return source_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END_OF_SCENES
+        
+        def load_scenes():
+            for i, scene_token in enumerate(scene_tokens):
+                if stop_event.is_set():
+                    break
+                try:
+                    logger.info("Processing scene %d/%d: %s", i+1, len(scene_tokens), scene_token)
+                    load_start = time.time()
+                    scene_inputs = self._load_scene_inputs(scene_token)
+                    put(inference_queue, (scene_inputs, time.time() - load_start))
+                except Exception as e:
+                    record_failure(scene_token, e)
+            for _ in range(num_inference_streams):
+                put(inference_queue, _END_OF_SCENES)
+        
+        def infer_scenes():
+            stream = self.inference_engine.create_stream()
+            finished = False
+            while not finished:
+                # Coalesce scenes that are already loaded into a single forward pass
+                items = [get(inference_queue)]
+                while len(items) < inference_batch_size and items[-1] is not _END_OF_SCENES:
+                    try:
+                        items.append(inference_queue.get(timeout=0.005))
+                    except queue.Empty:
+                        break
+                if items[-1] is _END_OF_SCENES:
+                    items.pop()
+                    finished = True
+                if not items:
+                    continue
+                
+                inference_start = time.time()
+                try:
+                    prediction_results = self._run_inference_batch([scene_inputs for scene_inputs, _ in items], stream)
+                except Exception as e:
+                    # Retry scene by scene so one bad scene does not fail the whole batch
+                    logger.warning(f"Batched inference failed ({e}), retrying {len(items)} scenes individually")
+                    prediction_results = []
+                    for scene_inputs, _ in items:
+                        try:
+                            prediction_results.append(self._run_inference(scene_inputs, stream))
+                        except Exception as scene_error:
+                            record_failure(scene_inputs["scene_token"], scene_error)
+                            prediction_results.append(None)
+                inference_share = (time.time() - inference_start) / len(items)
+                
+                for (scene_inputs, elapsed), prediction_result in zip(items, prediction_results):
+                    if prediction_result is not None:
+                        put(render_queue, (scene_inputs, prediction_result, elapsed + inference_share))
+            put(render_queue, _END_OF_SCENES)
+        
+        workers = [threading.Thread(target=load_scenes, name="batch-scene-loader", daemon=True)]
+        workers.extend(
+            threading.Thread(target=infer_scenes, name=f"batch-scene-inference-{i}", daemon=True)
+            for i in range(num_inference_streams)
+        )
+        for worker in workers:
+            worker.start()
+        
+        render_pool = self._create_render_pool(len(scene_tokens)) if render_visualization else None
+        # Renders submitted but not yet finished; bounded so that results do not pile
+        # up in memory when rendering is slower than inference
+        pending_renders = []
+        max_pending_renders = 2 * self.config.get("visualization", {}).get("num_render_workers", 0)
+        
+        def finish_oldest_render():
+            pending_render = pending_renders.pop(0)
+            error = self._finish_render(pending_render)
+            if error is not None:
+                record_failure(pending_render[1]["scene_token"], error)
+            else:
+                finish_result(pending_render[1])
+        
+        try:
+            num_finished_inference = 0
+            while num_finished_inference < num_inference_streams:
+                item = render_queue.get()
+                if item is _END_OF_SCENES:
+                    num_finished_inference += 1
+                    continue
+                scene_inputs, prediction_result, elapsed = item
+                try:
+                    # Report the time spent on the scene itself, not time spent queued
+                    result = self._build_scene_result(
+                        scene_inputs,
+                        prediction_result,
+                        time_window=time_window,
+                        save_visualization=render_visualization,
+                        output_dir=output_dir,
+                        start_time=time.time() - elapsed,
+                        render=render_visualization and render_pool is None,
+                        create_output_dir=False,
+                        return_figure=False
+                    )
+                except Exception as e:
+                    record_failure(scene_inputs["scene_token"], e)
+                    continue
+                    
+                if render_pool is None:
+                    finish_result(result)
+                else:
+                    pending_renders.append(self._submit_render(render_pool, scene_inputs, result, time_window))
+                    while len(pending_renders) > max_pending_renders:
+                        finish_oldest_render()
+                
+            while pending_renders:
+                finish_oldest_render()
+        finally:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+            if render_pool is not None:
+                render_pool.shutdown()
+    
+    def _run_batch_in_workers(
+        self,
+        scene_tokens: List[str],
+        time_window: Tuple[float, float],
+        output_dir: Path,
+        num_workers: int,
+        return_results: bool,
+        render_visualization: bool,
+        finish_result,
+        record_failure
+    ):
+        """
+        Process the scenes of a batch in worker processes
+        
+        Each worker loads, predicts and renders whole scenes with its own application,
+        with its model on a GPU chosen round-robin among the visible GPUs.
+        
+        Args:
+            scene_tokens: Scene tokens to process
+            time_window: Time window for visualization
+            output_dir: Output directory for results
+            num_workers: Number of worker processes
+            return_results: Whether workers send back full results or only scene records
+            render_visualization: Whether to render and save visualizations
+            finish_result: Called with the result (and record) of each processed scene
+            record_failure: Called with the token and error of each failed scene
+        """
+        logger.info(f"Processing scenes in {num_workers} worker processes...")
+        
+        # spawn: forking a process that holds CUDA state or a GUI backend is unsafe
+        mp_context = multiprocessing.get_context("spawn")
+        worker_ids = mp_context.Queue()
+        for worker_id in range(num_workers):
+            worker_ids.put(worker_id)
+        
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp_context,
+            initializer=_init_scene_worker,
+            initargs=(self.config, worker_ids)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _run_scene, scene_token, time_window, output_dir, return_results, render_visualization
+                ): scene_token
+                for scene_token in scene_tokens
+            }
+            for i, future in enumerate(as_completed(futures)):
+                scene_token = futures[future]
+                try:
+                    scene_result = future.result()
+                except Exception as e:
+                    record_failure(scene_token, e)
+                    continue
+                logger.info("Finished scene %d/%d: %s", i+1, len(scene_tokens), scene_token)
+                if return_results:
+                    finish_result(scene_result)
+                else:
+                    finish_result(None, scene_result)
+    
+    def _compact_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reduce a prediction result to the fields needed for batch summaries
+        """
+        return {
+            "scene_token": result["scene_token"],
+            "scene_metadata": result["scene_metadata"],
+            "metrics": {k: float(v) for k, v in result["metrics"].items()},
+            "processing_time": result["processing_time"],
+            "save_path": result["visualization"]["save_path"]
+        }
     
     def _create_batch_summary(
         self, 
@@ -313,10 +903,14 @@ class TrajectoryPredictionApp:
         if not results:
             return {}
         
-        # Calculate aggregate metrics
-        all_ades = [r["metrics"]["ade"] for r in results if r["metrics"]]
-        all_fdes = [r["metrics"]["fde"] for r in results if r["metrics"]]
-        processing_times = [r["processing_time"] for r in results]
+        # One (ade, fde) row per scene, NaN for scenes without metrics
+        scene_metrics = np.full((len(results), 2), np.nan)
+        for i, r in enumerate(results):
+            if r["metrics"]:
+                scene_metrics[i] = r["metrics"]["ade"], r["metrics"]["fde"]
+        has_metrics = ~np.isnan(scene_metrics[:, 0])
+        valid_metrics = scene_metrics[has_metrics]
+        processing_times = np.fromiter((r["processing_time"] for r in results), dtype=np.float64, count=len(results))
         
         summary = {
             "total_scenes": len(results) + len(failed_scenes),
@@ -324,44 +918,50 @@ class TrajectoryPredictionApp:
             "failed_scenes": len(failed_scenes),
             "success_rate": len(results) / (len(results) + len(failed_scenes)) * 100,
             "aggregate_metrics": {
-                "mean_ade": sum(all_ades) / len(all_ades) if all_ades else 0,
-                "mean_fde": sum(all_fdes) / len(all_fdes) if all_fdes else 0,
-                "mean_processing_time": sum(processing_times) / len(processing_times)
+                "mean_ade": float(valid_metrics[:, 0].mean()) if len(valid_metrics) else 0,
+                "mean_fde": float(valid_metrics[:, 1].mean()) if len(valid_metrics) else 0,
+                "mean_processing_time": float(processing_times.mean())
             },
             "scenario_breakdown": {}
         }
         
-        # Breakdown by map location (more meaningful than scenario_type which is always "unknown")
-        for result in results:
-            map_name = result["scene_metadata"].get("map_name", "unknown_map")
-            if map_name not in summary["scenario_breakdown"]:
-                summary["scenario_breakdown"][map_name] = {
-                    "count": 0,
-                    "ades": [],
-                    "fdes": []
-                }
-            
-            summary["scenario_breakdown"][map_name]["count"] += 1
-            if result["metrics"]:
-                summary["scenario_breakdown"][map_name]["ades"].append(result["metrics"]["ade"])
-                summary["scenario_breakdown"][map_name]["fdes"].append(result["metrics"]["fde"])
-        
-        # Calculate location-specific metrics
-        for map_name, data in summary["scenario_breakdown"].items():
-            if data["ades"]:
-                data["mean_ade"] = sum(data["ades"]) / len(data["ades"])
-                data["mean_fde"] = sum(data["fdes"]) / len(data["fdes"])
-            else:
-                data["mean_ade"] = 0
-                data["mean_fde"] = 0
-            # Remove raw lists to keep summary clean
-            del data["ades"]
-            del data["fdes"]
+        # Breakdown by map location (more meaningful than scenario_type which is always "unknown"),
+        # grouped in one pass: map_index[i] is the position of scene i's map in map_names
+        map_names, map_index = np.unique(
+            [r["scene_metadata"].get("map_name", "unknown_map") for r in results],
+            return_inverse=True
+        )
+        num_maps = len(map_names)
+        scene_counts = np.bincount(map_index, minlength=num_maps)
+        metric_counts = np.bincount(map_index[has_metrics], minlength=num_maps)
+        
+        # Calculate location-specific metrics (0 for locations without any metrics)
+        mean_metrics = []
+        for column in range(2):
+            metric_sums = np.bincount(map_index[has_metrics], weights=valid_metrics[:, column], minlength=num_maps)
+            mean_metrics.append(np.divide(
+                metric_sums, metric_counts, out=np.zeros(num_maps), where=metric_counts > 0
+            ))
         
-        # Save summary to file
-        summary_path = output_dir / "batch_summary.yaml"
-        with open(summary_path, 'w') as f:
-            yaml.dump(summary, f, default_flow_style=False, indent=2)
+        for k, map_name in enumerate(map_names):
+            summary["scenario_breakdown"][str(map_name)] = {
+                "count": int(scene_counts[k]),
+                "mean_ade": float(mean_metrics[0][k]),
+                "mean_fde": float(mean_metrics[1][k])
+            }
+        
+        # Save summary to file, emitted into memory first and written in a single call
+        if self.config.get("output", {}).get("summary_format", "yaml") == "json":
+            summary_path = output_dir / "batch_summary.json"
+            if orjson is not None:
+                summary_path.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+            else:
+                summary_path.write_text(json.dumps(summary, indent=2))
+        else:
+            summary_path = output_dir / "batch_summary.yaml"
+            buffer = io.StringIO()
+            yaml.dump(summary, buffer, Dumper=SafeDumper, default_flow_style=False, sort_keys=False, indent=2)
+            summary_path.write_text(buffer.getvalue())
         
         logger.info(f"Batch summary saved to: {summary_path}")
         return summary
@@ -376,14 +976,50 @@ class TrajectoryPredictionApp:
         Returns:
             List of scene tokens
         """
+        num_available = self.data_manager.num_available_scenes()
+        
+        if num_available < num_scenes:
+            logger.warning(f"Requested {num_scenes} scenes but only {num_available} available")
+            num_scenes = num_available
+        
+        # Draw indices only, then look up just the picked tokens
+        indices = self._rng.choice(num_available, size=num_scenes, replace=False)
         available_scenes = self.data_manager.get_available_scenes()
+        return [available_scenes[i] for i in indices]
+    
+    def get_random_scenes_stream(
+        self,
+        scene_tokens: Optional[Iterable[str]] = None,
+        num_scenes: int = 5
+    ) -> List[str]:
+        """
+        Get random scene tokens from a stream of tokens in a single pass
         
-        if len(available_scenes) < num_scenes:
-            logger.warning(f"Requested {num_scenes} scenes but only {len(available_scenes)} available")
-            num_scenes = len(available_scenes)
+        Uses reservoir sampling (Algorithm R), so memory stays O(num_scenes) however
+        many tokens the stream yields.
         
-        import random
-        return random.sample(available_scenes, num_scenes)
+        Args:
+            scene_tokens: Iterable of scene tokens (all available scenes if not given)
+            num_scenes: Number of random scenes to return
+            
+        Returns:
+            List of scene tokens
+        """
+        if scene_tokens is None:
+            scene_tokens = self.data_manager.iter_available_scenes()
+        
+        reservoir = []
+        for i, scene_token in enumerate(scene_tokens):
+            if i < num_scenes:
+                reservoir.append(scene_token)
+            else:
+                j = self._rng.integers(0, i + 1)
+                if j < num_scenes:
+                    reservoir[j] = scene_token
+        
+        if len(reservoir) < num_scenes:
+            logger.warning(f"Requested {num_scenes} scenes but only {len(reservoir)} available")
+        return reservoir
     
     def get_app_info(self) -> Dict[str, Any]:
         """
@@ -406,6 +1042,18 @@ class TrajectoryPredictionApp:
             "status": "ready"
         }
     
+    def clear_cache(self):
+        """
+        Drop the cached scene inputs
+        
+        Long-running services should call this when the underlying scene data changes,
+        or to release the memory held by recently processed scenes.
+        """
+        with self._scene_cache_lock:
+            num_cached = len(self._scene_cache)
+            self._scene_cache.clear()
+        logger.info("Cleared %d cached scenes", num_cached)
+    
     def create_demo_visualization(
         self, 
         num_scenes: int = 3, 
@@ -434,34 +1082,97 @@ class TrajectoryPredictionApp:
         
         demo_results = []
         
-        for i, scene_token in enumerate(random_scenes):
-            logger.info(f"Creating demo {i+1}/{len(random_scenes)}: {scene_token}")
-            
-            for j, time_window in enumerate(time_windows):
+        # Figures are rendered in worker processes if configured, otherwise right away
+        render_pool = self._create_render_pool(len(random_scenes) * len(time_windows))
+        pending_renders = []
+        failed_renders = []
+        
+        # The next scene is loaded in the background while the current one is
+        # predicted and rendered
+        def load_scene(scene_token: str):
+            load_start = time.time()
+            return self._load_scene_inputs(scene_token), time.time() - load_start
+        
+        scene_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="demo-scene-loader")
+        next_scene = scene_loader.submit(load_scene, random_scenes[0]) if random_scenes else None
+        
+        try:
+            for i, scene_token in enumerate(random_scenes):
+                logger.info("Creating demo %d/%d: %s", i+1, len(random_scenes), scene_token)
+                current_scene = next_scene
+                if i + 1 < len(random_scenes):
+                    next_scene = scene_loader.submit(load_scene, random_scenes[i + 1])
+                
+                # Predict and synchronize once per scene up to the longest window; the time
+                # grid of each window is a prefix of it
                 try:
-                    result = self.predict_single_scene(
-                        scene_token,
-                        time_window=time_window,
-                        save_visualization=True,
-                        output_dir=output_dir / f"scene_{i+1}"
+                    scene_inputs, load_time = current_scene.result()
+                    scene_start = time.time() - load_time
+                    prediction_result = self._run_inference(scene_inputs)
+                    all_trajectories = scene_inputs["existing_trajectories"].copy()
+                    all_trajectories["prediction"] = prediction_result["trajectory"]
+                    full_synchronized = self.data_manager.synchronize_trajectories(
+                        all_trajectories, 
+                        time_horizon=max(time_window[1] for time_window in time_windows) + 1.0,  # Add buffer
+                        dt=0.1
                     )
-                    
-                    # Rename file to include time window info
-                    if result["visualization"]["save_path"]:
-                        old_path = result["visualization"]["save_path"]
-                        new_path = old_path.parent / f"{old_path.stem}_t{time_window[1]:.1f}s{old_path.suffix}"
-                        old_path.rename(new_path)
-                        result["visualization"]["save_path"] = new_path
-                    
-                    demo_results.append({
-                        "scene_index": i+1,
-                        "scene_token": scene_token,
-                        "time_window": time_window,
-                        "result": result
-                    })
-                    
+                    shared_time = (time.time() - scene_start) / len(time_windows)
+                    scene_output_dir = output_dir / f"scene_{i+1}"
+                    scene_output_dir.mkdir(exist_ok=True)
                 except Exception as e:
-                    logger.error(f"Failed to create demo for scene {scene_token}, time window {time_window}: {e}")
+                    logger.error(f"Failed to create demo for scene {scene_token}: {e}")
+                    continue
+                
+                for j, time_window in enumerate(time_windows):
+                    try:
+                        result = self._build_scene_result(
+                            scene_inputs,
+                            prediction_result,
+                            time_window=time_window,
+                            save_visualization=True,
+                            output_dir=scene_output_dir,
+                            start_time=time.time() - shared_time,
+                            render=False,
+                            synchronized_trajectories=self.data_manager.slice_synchronized_trajectories(
+                                full_synchronized, time_window[1] + 1.0, dt=0.1
+                            ),
+                            create_output_dir=False,
+                            tag_time_window=True
+                        )
+                        
+                        if render_pool is not None:
+                            pending_renders.append(self._submit_render(render_pool, scene_inputs, result, time_window))
+                        else:
+                            _close_figure(_render_figure(
+                                self.visualizer, *self._render_args(scene_inputs, result, time_window)
+                            ))
+                        
+                        demo_results.append({
+                            "scene_index": i+1,
+                            "scene_token": scene_token,
+                            "time_window": time_window,
+                            "result": result
+                        })
+                        
+                    except Exception as e:
+                        logger.error(f"Failed to create demo for scene {scene_token}, time window {time_window}: {e}")
+            
+            for pending_render in pending_renders:
+                error = self._finish_render(pending_render)
+                if error is not None:
+                    failed_renders.append((pending_render[1], error))
+        finally:
+            scene_loader.shutdown(cancel_futures=True)
+            if render_pool is not None:
+                render_pool.shutdown()
+        
+        for result, error in failed_renders:
+            demo_result = next(d for d in demo_results if d["result"] is result)
+            logger.error(
+                f"Failed to create demo for scene {demo_result['scene_token']}, "
+                f"time window {demo_result['time_window']}: {error}"
+            )
+            demo_results.remove(demo_result)
         
         logger.info(f"Demo complete! Created {len(demo_results)} visualizations in {output_dir}")
         return {"results": demo_results, "output_dir": output_dir} 
\ No newline at end of file
@@ -7,7 +7,7 @@ This module handles scene data loading, trajectory management, and PDM cache int
 import logging
 import numpy as np
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import warnings
 
 from navsim.common.dataloader import SceneLoader
@@ -17,6 +17,27 @@ from navsim.common.dataloader import MetricCacheLoader
 logger = logging.getLogger(__name__)
 
 
+def calculate_trajectory_metrics(position_errors: np.ndarray) -> Dict[str, float]:
+    """
+    Calculate trajectory comparison metrics from per-step position errors
+    
+    Args:
+        position_errors: L2 distance between prediction and ground truth per time step [N]
+        
+    Returns:
+        Dictionary with metrics
+    """
+    if len(position_errors) == 0:
+        return {"ade": 0, "fde": 0, "max_error": 0, "rmse": 0}
+    
+    return {
+        "ade": float(np.mean(position_errors)),  # Average Displacement Error
+        "fde": float(position_errors[-1]),       # Final Displacement Error
+        "max_error": float(np.max(position_errors)),
+        "rmse": float(np.sqrt(np.mean(position_errors**2)))
+    }
+
+
 class TrajectoryDataManager:
     """
     Manages scene data loading and trajectory synchronization
@@ -39,6 +60,9 @@ class TrajectoryDataManager:
         # Initialize scene loader using agent's sensor config
         self.scene_loader = self._create_scene_loader()
         
+        # Token set for O(1) membership checks (SceneLoader.tokens is a list)
+        self._scene_token_set = set(self.scene_loader.tokens)
+        
         # Initialize metric cache loader
         cache_path = data_config.get("cache_path")
         if cache_path and Path(cache_path).exists():
@@ -88,6 +112,36 @@ class TrajectoryDataManager:
             tokens = tokens[:limit]
         return tokens
     
+    def iter_available_scenes(self) -> Iterator[str]:
+        """
+        Iterate over the available scene tokens without copying them
+        
+        Returns:
+            Iterator over scene tokens
+        """
+        return iter(self.scene_loader.tokens)
+    
+    def num_available_scenes(self) -> int:
+        """
+        Get the number of available scenes
+        
+        Returns:
+            Number of scene tokens
+        """
+        return len(self.scene_loader.tokens)
+    
+    def has_scene(self, scene_token: str) -> bool:
+        """
+        Check whether a scene token is available
+        
+        Args:
+            scene_token: Scene token to check
+            
+        Returns:
+            True if the scene can be loaded
+        """
+        return scene_token in self._scene_token_set
+    
     def load_scene_data(self, scene_token: str) -> Dict[str, Any]:
         """
         Load complete scene data for a given token
@@ -99,14 +153,14 @@ class TrajectoryDataManager:
             Dictionary containing scene data and metadata
         """
         # Verify token exists
-        if scene_token not in self.scene_loader.tokens:
+        if not self.has_scene(scene_token):
             available_tokens = self.scene_loader.tokens[:5]
             raise ValueError(
                 f"Scene token {scene_token} not found. "
                 f"Available tokens (first 5): {available_tokens}"
             )
         
-        logger.debug(f"Loading scene data for token: {scene_token}")
+        logger.debug("Loading scene data for token: %s", scene_token)
         
         # Load scene
         scene = self.scene_loader.get_scene_from_token(scene_token)
@@ -150,17 +204,23 @@ class TrajectoryDataManager:
             "metadata": metadata
         }
     
-    def get_all_trajectories(self, scene_token: str) -> Dict[str, Any]:
+    def get_all_trajectories(
+        self, 
+        scene_token: str, 
+        scene_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Get all available trajectories for a scene (GT, PDM-Closed, etc.)
         
         Args:
             scene_token: Scene token
+            scene_data: Already loaded scene data for the token (loaded if not given)
             
         Returns:
             Dictionary containing all available trajectories
         """
-        scene_data = self.load_scene_data(scene_token)
+        if scene_data is None:
+            scene_data = self.load_scene_data(scene_token)
         scene = scene_data["scene"]
         
         trajectories = {}
@@ -169,7 +229,7 @@ class TrajectoryDataManager:
         try:
             gt_trajectory = scene.get_future_trajectory()
             trajectories["ground_truth"] = gt_trajectory
-            logger.debug(f"Loaded GT trajectory with {len(gt_trajectory.poses)} points")
+            logger.debug("Loaded GT trajectory with %d points", len(gt_trajectory.poses))
         except Exception as e:
             logger.warning(f"Could not load ground truth trajectory: {e}")
         
@@ -179,7 +239,7 @@ class TrajectoryDataManager:
                 pdm_trajectory = self._load_pdm_trajectory(scene_token)
                 if pdm_trajectory:
                     trajectories["pdm_closed"] = pdm_trajectory
-                    logger.debug(f"Loaded PDM trajectory with {len(pdm_trajectory.poses)} points")
+                    logger.debug("Loaded PDM trajectory with %d points", len(pdm_trajectory.poses))
             except Exception as e:
                 logger.warning(f"Could not load PDM trajectory: {e}")
         
@@ -201,7 +261,7 @@ class TrajectoryDataManager:
         try:
             # Check if token exists in cache
             if scene_token not in self.metric_cache_loader.tokens:
-                logger.debug(f"Token {scene_token} not found in metric cache")
+                logger.debug("Token %s not found in metric cache", scene_token)
                 return None
                 
             # Load metric cache
@@ -222,7 +282,7 @@ class TrajectoryDataManager:
             return Trajectory(poses=poses)
             
         except Exception as e:
-            logger.debug(f"Failed to load PDM trajectory for {scene_token}: {e}")
+            logger.debug("Failed to load PDM trajectory for %s: %s", scene_token, e)
             return None
     
     def synchronize_trajectories(
@@ -272,10 +332,56 @@ class TrajectoryDataManager:
                 "interpolated": len(sync_poses) != len(poses)
             }
             
-            logger.debug(f"Synchronized {name}: {len(poses)} -> {len(sync_poses)} points")
+            logger.debug("Synchronized %s: %d -> %d points", name, len(poses), len(sync_poses))
+        
+        # Position errors of the prediction against ground truth on the common grid
+        # (ignore heading for now), shared by the metrics and the statistics panel
+        if "ground_truth" in synchronized and "prediction" in synchronized:
+            gt_poses = synchronized["ground_truth"]["poses"]
+            pred_poses = synchronized["prediction"]["poses"]
+            min_length = min(len(gt_poses), len(pred_poses))
+            synchronized["prediction"]["position_errors"] = np.linalg.norm(
+                gt_poses[:min_length, :2] - pred_poses[:min_length, :2], axis=1
+            )
         
         return synchronized
     
+    def slice_synchronized_trajectories(
+        self, 
+        synchronized: Dict[str, Dict[str, Any]], 
+        time_horizon: float,
+        dt: float = 0.1
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Cut synchronized trajectories down to a shorter time horizon
+        
+        The time grid of a shorter horizon is a prefix of the grid of a longer one, so the
+        result equals synchronize_trajectories(..., time_horizon) without resampling.
+        
+        Args:
+            synchronized: Output of synchronize_trajectories with a horizon >= time_horizon
+            time_horizon: Maximum time horizon in seconds
+            dt: Time step in seconds (same as used for synchronized)
+            
+        Returns:
+            Dictionary with synchronized trajectory data; poses and timestamps are views
+        """
+        num_steps = len(np.arange(0, time_horizon + dt, dt))
+        sliced = {}
+        
+        for name, data in synchronized.items():
+            sync_poses = data["poses"][:num_steps]
+            sliced[name] = {
+                **data,
+                "poses": sync_poses,
+                "timestamps": data["timestamps"][:num_steps],
+                "interpolated": len(sync_poses) != data["original_length"]
+            }
+            if "position_errors" in data:
+                sliced[name]["position_errors"] = data["position_errors"][:num_steps]
+        
+        return sliced
+    
     def _interpolate_trajectory(
         self, 
         poses: np.ndarray, 
@@ -338,7 +444,7 @@ class TrajectoryDataManager:
                 map_names.append(scene_data["metadata"]["map_name"])
                 log_names.append(scene_data["metadata"]["log_name"])
             except Exception as e:
-                logger.debug(f"Failed to load scene {token} for statistics: {e}")
+                logger.debug("Failed to load scene %s for statistics: %s", token, e)
         
         unique_maps = list(set(map_names))
         unique_logs = list(set(log_names))
@@ -6,36 +6,80 @@ NavSim 数据结构探索脚本
 帮助我们理解真实的数据格式，避免在data_manager中出错。
 """
 
+import dataclasses
+import functools
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
-import traceback
+from typing import Any, Dict, List, Optional, Tuple
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+@functools.lru_cache(maxsize=None)
+def _class_members(cls: type) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    获取类的公开成员，每个类型只计算一次
+    
+    Args:
+        cls: 要检查的类型
+        
+    Returns:
+        (数据类字段, 类属性, property, 方法) 的名称
+    """
+    fields = tuple(field.name for field in dataclasses.fields(cls)) if dataclasses.is_dataclass(cls) else ()
+    class_attrs, properties, methods = [], [], []
+    seen = set(fields)
+    
+    # 按 MRO 遍历类字典，子类的定义优先
+    for klass in cls.__mro__:
+        if klass is object:
+            continue
+        for name, member in vars(klass).items():
+            if name.startswith('_') or name in seen:
+                continue
+            seen.add(name)
+            if isinstance(member, (property, functools.cached_property)):
+                properties.append(name)
+            elif callable(member) or isinstance(member, (staticmethod, classmethod)):
+                methods.append(name)
+            else:
+                class_attrs.append(name)
+    
+    return fields, tuple(class_attrs), tuple(sorted(properties)), tuple(sorted(methods))
+
 def print_object_attributes(obj: Any, obj_name: str, max_depth: int = 2, current_depth: int = 0):
     """
     递归打印对象的所有属性
     
+    输出先收集起来，最后一次性写出，而不是每个属性一次 print
+    
     Args:
         obj: 要检查的对象
         obj_name: 对象名称
         max_depth: 最大递归深度
         current_depth: 当前递归深度
     """
+    lines = []
+    _collect_object_attributes(obj, obj_name, max_depth, current_depth, lines)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def _collect_object_attributes(obj: Any, obj_name: str, max_depth: int, current_depth: int, lines: List[str]):
+    """print_object_attributes 的递归实现，把输出行追加到 lines"""
     indent = "  " * current_depth
-    print(f"{indent}📋 {obj_name} ({type(obj).__name__}):")
+    lines.append(f"{indent}📋 {obj_name} ({type(obj).__name__}):")
     
     if current_depth >= max_depth:
-        print(f"{indent}  (最大深度已达到)")
+        lines.append(f"{indent}  (最大深度已达到)")
         return
     
     try:
-        # 获取所有属性
-        attributes = [attr for attr in dir(obj) if not attr.startswith('_')]
+        # 获取所有属性：数据类字段、实例属性和类属性才需要取值，
+        # property 可能触发任意耗时的计算，只列出名称
+        fields, class_attrs, properties, methods = _class_members(type(obj))
+        instance_attrs = [attr for attr in getattr(obj, '__dict__', {}) if not attr.startswith('_')]
+        attributes = sorted(set(fields).union(instance_attrs, class_attrs))
         
         for attr in attributes:
             try:
@@ -44,25 +88,32 @@ def print_object_attributes(obj: Any, obj_name: str, max_depth: int = 2, current
                 
                 # 简化显示
                 if callable(value):
-                    print(f"{indent}  🔧 {attr}() -> method")
+                    lines.append(f"{indent}  🔧 {attr}() -> method")
                 elif isinstance(value, (str, int, float, bool)):
-                    print(f"{indent}  📝 {attr}: {value} ({value_type})")
+                    lines.append(f"{indent}  📝 {attr}: {value} ({value_type})")
                 elif isinstance(value, (list, tuple)):
-                    print(f"{indent}  📋 {attr}: {value_type}[{len(value)}]")
+                    lines.append(f"{indent}  📋 {attr}: {value_type}[{len(value)}]")
                     if len(value) > 0 and current_depth < max_depth - 1:
-                        print_object_attributes(value[0], f"{attr}[0]", max_depth, current_depth + 1)
+                        _collect_object_attributes(value[0], f"{attr}[0]", max_depth, current_depth + 1, lines)
                 elif hasattr(value, '__dict__') or hasattr(value, '__dataclass_fields__'):
-                    print(f"{indent}  🔧 {attr}: {value_type}")
+                    lines.append(f"{indent}  🔧 {attr}: {value_type}")
                     if current_depth < max_depth - 1:
-                        print_object_attributes(value, attr, max_depth, current_depth + 1)
+                        _collect_object_attributes(value, attr, max_depth, current_depth + 1, lines)
                 else:
-                    print(f"{indent}  📦 {attr}: {value_type}")
+                    lines.append(f"{indent}  📦 {attr}: {value_type}")
                     
             except Exception as e:
-                print(f"{indent}  ❌ {attr}: Error accessing ({e})")
+                lines.append(f"{indent}  ❌ {attr}: Error accessing ({e})")
+        
+        for attr in properties:
+            if attr not in attributes:
+                lines.append(f"{indent}  ⚙️ {attr} -> property (未求值)")
+        
+        for attr in methods:
+            lines.append(f"{indent}  🔧 {attr}() -> method")
                 
     except Exception as e:
-        print(f"{indent}  ❌ Error getting attributes: {e}")
+        lines.append(f"{indent}  ❌ Error getting attributes: {e}")
 
 def explore_navsim_dataclasses():
     """探索NavSim数据类的结构"""
@@ -95,11 +146,18 @@ def explore_navsim_dataclasses():
         
     except Exception as e:
         print(f"❌ 数据类探索失败: {e}")
+        import traceback
         traceback.print_exc()
         return False
 
-def explore_real_scene_data():
-    """探索真实的场景数据"""
+def explore_real_scene_data(max_scenes: Optional[int] = 1):
+    """
+    探索真实的场景数据
+    
+    Args:
+        max_scenes: 最多加载的场景数。只分析第一个场景，所以默认加载到第一个场景就停止，
+            不必读取所有日志文件；传入 None 加载全部场景
+    """
     print("\n🔍 探索真实场景数据...")
     print("=" * 80)
     
@@ -121,7 +179,7 @@ def explore_real_scene_data():
         print(f"📁 数据路径: {data_path}")
         
         # 创建SceneLoader
-        scene_filter = SceneFilter(log_names=None, tokens=None)
+        scene_filter = SceneFilter(log_names=None, tokens=None, max_scenes=max_scenes)
         sensor_config = SensorConfig.build_no_sensors()  # 最小传感器配置以节省内存
         
         scene_loader = SceneLoader(
@@ -131,7 +189,7 @@ def explore_real_scene_data():
             sensor_config=sensor_config
         )
         
-        print(f"📊 找到 {len(scene_loader.tokens)} 个场景")
+        print(f"📊 加载了 {len(scene_loader.tokens)} 个场景" + (f" (最多 {max_scenes} 个)" if max_scenes else ""))
         
         if len(scene_loader.tokens) == 0:
             print("❌ 没有找到场景数据")
@@ -179,6 +237,7 @@ def explore_real_scene_data():
         
     except Exception as e:
         print(f"❌ 真实数据探索失败: {e}")
+        import traceback
         traceback.print_exc()
         return False
 
@@ -212,6 +271,7 @@ def test_corrected_metadata_extraction(scene, scene_token):
         
     except Exception as e:
         print(f"❌ metadata 提取失败: {e}")
+        import traceback
         traceback.print_exc()
         return None
 
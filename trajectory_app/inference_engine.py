@@ -4,9 +4,16 @@ Trajectory Inference Engine
 This module provides the core inference engine for trajectory prediction models.
 """
 
+import contextlib
+import functools
+import importlib
+import inspect
 import logging
+import pickle
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 import torch
 
 from navsim.agents.abstract_agent import AbstractAgent
@@ -14,6 +21,32 @@ from navsim.common.dataclasses import AgentInput, Trajectory, Scene
 
 logger = logging.getLogger(__name__)
 
+# Display name of each supported model type; the agent and its config live in
+# navsim.agents.<type>.transfuser_agent / .transfuser_config
+_MODEL_NAMES = {
+    "diffusiondrive": "DiffusionDrive",
+    "transfuser": "Transfuser"
+}
+
+# torch.load only accepts mmap from torch 2.1 on
+_TORCH_LOAD_SUPPORTS_MMAP = "mmap" in inspect.signature(torch.load).parameters
+
+# Autocast dtype of the forward pass for each supported precision (None runs in FP32)
+_AUTOCAST_DTYPES = {
+    "fp32": None,
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_agent_classes(model_type: str) -> Tuple[type, type]:
+    """Import the agent and config classes of a model type, once per process"""
+    package = f"navsim.agents.{model_type}"
+    agent_cls = importlib.import_module(f"{package}.transfuser_agent").TransfuserAgent
+    config_cls = importlib.import_module(f"{package}.transfuser_config").TransfuserConfig
+    return agent_cls, config_cls
+
 
 class TrajectoryInferenceEngine:
     """
@@ -30,11 +63,31 @@ class TrajectoryInferenceEngine:
                 - type: Model type ("diffusiondrive", "transfuser", etc.)
                 - checkpoint_path: Path to model checkpoint
                 - lr: Learning rate (used during agent initialization)
+                - checkpoint_load_kwargs: Keyword arguments for torch.load of the checkpoint
+                - precision: Forward pass precision on CUDA ("fp32", "bf16" or "fp16")
         """
         self.model_type = model_config.get("type", "diffusiondrive")
         self.checkpoint_path = model_config.get("checkpoint_path")
         self.lr = model_config.get("lr", 6e-4)
+        # By default the checkpoint is read on the CPU (memory-mapped where torch supports
+        # it), so tensors are paged in on demand and copied to the device once, by load_model
+        load_kwargs_overrides = model_config.get("checkpoint_load_kwargs", {})
+        self.checkpoint_load_kwargs = {"map_location": "cpu", "weights_only": True}
+        if _TORCH_LOAD_SUPPORTS_MMAP:
+            self.checkpoint_load_kwargs["mmap"] = True
+        self.checkpoint_load_kwargs.update(load_kwargs_overrides)
+        # Checkpoints that pickle more than tensors (e.g. Lightning hyperparameters) are
+        # retried with the full unpickler, unless weights_only was set explicitly
+        self._weights_only_fallback = "weights_only" not in load_kwargs_overrides
+        self.precision = model_config.get("precision", "fp32")
+        if self.precision not in _AUTOCAST_DTYPES:
+            raise ValueError(f"Unsupported precision: {self.precision}")
         self.agent = None
+        # Properties of the loaded agent, cached by load_model
+        self._sensor_config = None
+        self._feature_builders = None
+        self._num_parameters = 0
+        self._num_trainable_parameters = 0
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
         logger.info(f"Initializing inference engine for {self.model_type} model")
@@ -44,24 +97,44 @@ class TrajectoryInferenceEngine:
         """
         Load and initialize the model following the evaluation script pattern
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        if self.model_type == "diffusiondrive":
-            self._load_diffusiondrive_model()
-        elif self.model_type == "transfuser":
-            self._load_transfuser_model()
-        else:
+        if self.model_type not in _MODEL_NAMES:
             raise ValueError(f"Unsupported model type: {self.model_type}")
         
+        # Create the CUDA context in the background while the agent is built and its
+        # checkpoint is read, which only need the CPU
+        cuda_warmup = None
+        if self.device.type == "cuda":
+            cuda_warmup = threading.Thread(
+                target=lambda: torch.empty(1, device=self.device), name="cuda-warmup", daemon=True
+            )
+            cuda_warmup.start()
+        
+        self._load_agent()
+        
+        if cuda_warmup is not None:
+            cuda_warmup.join()
+        
         # Set to evaluation mode and move to device
         self.agent.eval()
         self.agent.to(self.device)
         
-        load_time = time.time() - start_time
+        # Cache what does not change until the model is reloaded; parameters are
+        # counted in a single pass over the module tree
+        self._sensor_config = self.agent.get_sensor_config()
+        self._feature_builders = self.agent.get_feature_builders()
+        self._num_parameters = self._num_trainable_parameters = 0
+        for param in self.agent.parameters():
+            self._num_parameters += param.numel()
+            if param.requires_grad:
+                self._num_trainable_parameters += param.numel()
+        
+        load_time = time.perf_counter() - start_time
         logger.info(f"Model loaded successfully in {load_time:.2f}s")
         logger.info(f"Model device: {self.device}")
-        logger.info(f"CUDA available: {torch.cuda.is_available()}")
-        logger.info(f"Sensor config: {self.agent.get_sensor_config()}")
+        logger.info(f"CUDA available: {self.device.type == 'cuda'}")
+        logger.info(f"Sensor config: {self._sensor_config}")
         
         # Device verification
         model_params_device = next(self.agent.parameters()).device
@@ -72,17 +145,17 @@ class TrajectoryInferenceEngine:
         else:
             logger.info(f"✅ Model and expected device match: {self.device}")
         
-    def _load_diffusiondrive_model(self):
-        """Load DiffusionDrive model"""
+    def _load_agent(self):
+        """Load the agent of the configured model type"""
+        model_name = _MODEL_NAMES[self.model_type]
         try:
-            from navsim.agents.diffusiondrive.transfuser_config import TransfuserConfig
-            from navsim.agents.diffusiondrive.transfuser_agent import TransfuserAgent
+            agent_cls, config_cls = _get_agent_classes(self.model_type)
             
             # Create configuration
-            config = TransfuserConfig()
+            config = config_cls()
             
             # Create agent instance
-            self.agent = TransfuserAgent(
+            self.agent = agent_cls(
                 config=config,
                 lr=self.lr,
                 checkpoint_path=self.checkpoint_path
@@ -91,140 +164,203 @@ class TrajectoryInferenceEngine:
             # Initialize weights if checkpoint provided
             if self.checkpoint_path:
                 logger.info(f"Loading checkpoint from: {self.checkpoint_path}")
-                self.agent.initialize()
+                self._load_checkpoint()
             else:
                 logger.warning("No checkpoint provided, using randomly initialized weights")
                 
         except Exception as e:
-            logger.error(f"Failed to load DiffusionDrive model: {e}")
+            logger.error(f"Failed to load {model_name} model: {e}")
             raise
-            
-    def _load_transfuser_model(self):
-        """Load Transfuser model"""
+    
+    def _load_checkpoint(self):
+        """
+        Load the checkpoint weights into the agent
+        
+        Same as the agents' initialize(), but the file is read with checkpoint_load_kwargs
+        """
         try:
-            from navsim.agents.transfuser.transfuser_config import TransfuserConfig
-            from navsim.agents.transfuser.transfuser_agent import TransfuserAgent
-            
-            # Create configuration
-            config = TransfuserConfig()
-            
-            # Create agent instance
-            self.agent = TransfuserAgent(
-                config=config,
-                lr=self.lr,
-                checkpoint_path=self.checkpoint_path
-            )
-            
-            # Initialize weights if checkpoint provided
-            if self.checkpoint_path:
-                logger.info(f"Loading checkpoint from: {self.checkpoint_path}")
-                self.agent.initialize()
-            else:
-                logger.warning("No checkpoint provided, using randomly initialized weights")
-                
-        except Exception as e:
-            logger.error(f"Failed to load Transfuser model: {e}")
-            raise
+            checkpoint = torch.load(self.checkpoint_path, **self.checkpoint_load_kwargs)
+        except pickle.UnpicklingError:
+            if not (self._weights_only_fallback and self.checkpoint_load_kwargs.get("weights_only")):
+                raise
+            logger.warning("Checkpoint holds more than weights, reloading it with weights_only=False")
+            checkpoint = torch.load(self.checkpoint_path, **{**self.checkpoint_load_kwargs, "weights_only": False})
+        state_dict = checkpoint["state_dict"]
+        self.agent.load_state_dict({k.replace("agent.", ""): v for k, v in state_dict.items()})
     
-    def predict_trajectory(self, agent_input: AgentInput, scene: Optional[Scene] = None) -> Dict[str, Any]:
+    def predict_trajectory(
+        self,
+        agent_input: AgentInput,
+        scene: Optional[Scene] = None,
+        stream: Optional["torch.cuda.Stream"] = None
+    ) -> Dict[str, Any]:
         """
         Predict trajectory for given agent input
         
         Args:
             agent_input: Input data for the agent
             scene: Optional scene data (required for some models)
+            stream: Optional CUDA stream to run on (see create_stream)
             
         Returns:
             Dictionary containing prediction results and metadata
         """
+        return self.predict_trajectory_batch([agent_input], [scene], stream)[0]
+    
+    def create_stream(self) -> Optional["torch.cuda.Stream"]:
+        """
+        Create a CUDA stream for running inference concurrently with other streams
+        
+        Returns:
+            New CUDA stream, or None when the model is not on CUDA
+        """
+        return torch.cuda.Stream(device=self.device) if self.device.type == "cuda" else None
+    
+    def predict_trajectory_batch(
+        self,
+        agent_inputs: List[AgentInput],
+        scenes: Optional[List[Optional[Scene]]] = None,
+        stream: Optional["torch.cuda.Stream"] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Predict trajectories for several agent inputs in a single forward pass
+        
+        Args:
+            agent_inputs: Input data for each agent
+            scenes: Optional scene data for each agent input
+            stream: Optional CUDA stream for the copies and the forward pass. Calls
+                from several threads on separate streams overlap on the GPU.
+            
+        Returns:
+            List with one prediction result per agent input, in input order.
+            inference_time of each result is its share of the batch forward time,
+            batch_size the number of distinct inputs in the forward pass.
+        """
         if self.agent is None:
             raise ValueError("Model not loaded. Call load_model() first.")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # SOLUTION 1: Handle device mismatch by manually building features and transferring to device
         # This avoids modifying core NavSim code while ensuring model and data are on same device
-        logger.debug(f"Model device: {self.device}")
+        logger.debug("Model device: %s", self.device)
         
         try:
             # Set agent to eval mode
             self.agent.eval()
             
+            # The same input passed more than once (e.g. a scene repeated in a batch,
+            # which the app's scene cache hands out as the same object) is run once
+            unique_inputs = []
+            input_indices = {}
+            for agent_input in agent_inputs:
+                if id(agent_input) not in input_indices:
+                    input_indices[id(agent_input)] = len(unique_inputs)
+                    unique_inputs.append(agent_input)
+            sample_indices = [input_indices[id(agent_input)] for agent_input in agent_inputs]
+            
             # Manually build features (same as AbstractAgent.compute_trajectory)
-            features = {}
-            for builder in self.agent.get_feature_builders():
-                features.update(builder.compute_features(agent_input))
+            feature_list = []
+            for agent_input in unique_inputs:
+                sample_features = {}
+                for builder in self._feature_builders:
+                    sample_features.update(builder.compute_features(agent_input))
+                feature_list.append(sample_features)
             
-            logger.debug(f"Built {len(features)} feature tensors")
+            logger.debug("Built %d feature tensors for %d inputs", len(feature_list[0]), len(feature_list))
             
-            # Add batch dimension
-            features = {k: v.unsqueeze(0) for k, v in features.items()}
+            # Stack samples along a new batch dimension. On CUDA they are stacked straight
+            # into page-locked memory, so the host-to-device copies below can run
+            # asynchronously while the forward pass is being launched.
+            pin_memory = self.device.type == "cuda"
+            features = {
+                k: self._stack_feature([f[k] for f in feature_list], pin_memory)
+                for k in feature_list[0]
+            }
             
             # Log original device info
             original_devices = {k: v.device for k, v in features.items()}
-            logger.debug(f"Original feature devices: {original_devices}")
+            logger.debug("Original feature devices: %s", original_devices)
             
-            # CRITICAL FIX: Move features to same device as model
-            features = {k: v.to(self.device) for k, v in features.items()}
-            logger.debug(f"Moved features to device: {self.device}")
-            
-            # Perform inference with device-matched tensors
-            with torch.no_grad():
+            # Perform inference with device-matched tensors. inference_mode also skips
+            # the version counter and view tracking that no_grad still does. With a
+            # reduced precision, autocast runs eligible ops in BF16/FP16 and keeps
+            # precision-sensitive ones (e.g. normalization) in FP32.
+            autocast_dtype = _AUTOCAST_DTYPES[self.precision]
+            if autocast_dtype is not None and self.device.type == "cuda":
+                autocast = torch.autocast(device_type="cuda", dtype=autocast_dtype)
+            else:
+                autocast = contextlib.nullcontext()
+            with torch.inference_mode(), torch.cuda.stream(stream), autocast:
+                # CRITICAL FIX: Move features to same device as model
+                features = {k: v.to(self.device, non_blocking=pin_memory) for k, v in features.items()}
+                logger.debug("Moved features to device: %s", self.device)
+                
                 predictions = self.agent.forward(features)
                 
-                # Extract trajectory and move back to CPU for numpy conversion
-                trajectory_tensor = predictions["trajectory"].squeeze(0).cpu()
-                poses = trajectory_tensor.numpy()
+                # Move outputs back to CPU once for the whole batch, reduced precision
+                # outputs as FP32 (NumPy has no BF16)
+                predictions = {
+                    k: v.cpu().float() if v.dtype in (torch.float16, torch.bfloat16) else v.cpu()
+                    for k, v in predictions.items()
+                    if k in ("trajectory", "bev_semantic_map", "agent_states", "agent_labels")
+                }
+                if "bev_semantic_map" in predictions:
+                    bev_semantic_logits = predictions["bev_semantic_map"]
+                    # Convert logits to class predictions using argmax
+                    bev_semantic_maps = torch.argmax(bev_semantic_logits, dim=1).numpy()
+                    bev_confidences = torch.softmax(bev_semantic_logits, dim=1).max(dim=1)[0].numpy()
+            
+            # Build trajectory objects (same as AbstractAgent.compute_trajectory)
+            inference_time = (time.perf_counter() - start_time) / len(agent_inputs)
+            
+            results = []
+            for i in sample_indices:
+                pred_trajectory = Trajectory(predictions["trajectory"][i].numpy())
                 
                 # Extract additional features for visualization
                 extracted_features = {}
                 
                 # Extract BEV semantic map if available
                 if "bev_semantic_map" in predictions:
-                    bev_semantic_logits = predictions["bev_semantic_map"].squeeze(0).cpu()
-                    # Convert logits to class predictions using argmax
-                    bev_semantic_map = torch.argmax(bev_semantic_logits, dim=0).numpy()
                     extracted_features["bev_semantic_map"] = {
-                        "predictions": bev_semantic_map,  # [H, W] class indices
-                        "logits": bev_semantic_logits.numpy(),  # [num_classes, H, W] raw logits
-                        "confidence": torch.softmax(bev_semantic_logits, dim=0).max(dim=0)[0].numpy()  # [H, W] confidence
+                        "predictions": bev_semantic_maps[i],  # [H, W] class indices
+                        "logits": bev_semantic_logits[i].numpy(),  # [num_classes, H, W] raw logits
+                        "confidence": bev_confidences[i]  # [H, W] confidence
                     }
-                    logger.debug(f"Extracted BEV semantic map: {bev_semantic_map.shape}, classes: {torch.unique(torch.from_numpy(bev_semantic_map)).numpy()}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "Extracted BEV semantic map: %s, classes: %s",
+                            bev_semantic_maps[i].shape, np.unique(bev_semantic_maps[i])
+                        )
                 
                 # Extract agent predictions if available
                 if "agent_states" in predictions:
-                    agent_states = predictions["agent_states"].squeeze(0).cpu().numpy()
-                    extracted_features["agent_states"] = agent_states
+                    extracted_features["agent_states"] = predictions["agent_states"][i].numpy()
                 
                 if "agent_labels" in predictions:
-                    agent_labels = predictions["agent_labels"].squeeze(0).cpu().numpy()
-                    extracted_features["agent_labels"] = agent_labels
-            
-            # Build trajectory object (same as AbstractAgent.compute_trajectory)
-            from navsim.common.dataclasses import Trajectory
-            pred_trajectory = Trajectory(poses)
-            
-            inference_time = time.time() - start_time
-            
-            # Collect results
-            result = {
-                "trajectory": pred_trajectory,
-                "inference_time": inference_time,
-                "model_type": self.model_type,
-                "trajectory_length": len(pred_trajectory.poses),
-                "time_horizon": pred_trajectory.trajectory_sampling.time_horizon if hasattr(pred_trajectory, 'trajectory_sampling') else None,
-                "extracted_features": extracted_features,  # New: add extracted features
-                "device_info": {
-                    "model_device": str(self.device),
-                    "original_feature_devices": {k: str(v) for k, v in original_devices.items()},
-                    "inference_device": str(self.device)
-                }
-            }
+                    extracted_features["agent_labels"] = predictions["agent_labels"][i].numpy()
+                
+                # Collect results
+                results.append({
+                    "trajectory": pred_trajectory,
+                    "inference_time": inference_time,
+                    "batch_size": len(unique_inputs),
+                    "model_type": self.model_type,
+                    "trajectory_length": len(pred_trajectory.poses),
+                    "time_horizon": pred_trajectory.trajectory_sampling.time_horizon if hasattr(pred_trajectory, 'trajectory_sampling') else None,
+                    "extracted_features": extracted_features,  # New: add extracted features
+                    "device_info": {
+                        "model_device": str(self.device),
+                        "original_feature_devices": {k: str(v) for k, v in original_devices.items()},
+                        "inference_device": str(self.device)
+                    }
+                })
             
-            logger.debug(f"Inference completed in {inference_time:.3f}s on {self.device}")
-            logger.debug(f"Predicted trajectory with {len(pred_trajectory.poses)} points")
+            logger.debug("Inference completed in %.3fs on %s for %d inputs", inference_time * len(agent_inputs), self.device, len(agent_inputs))
+            logger.debug("Predicted trajectories with %d points", len(results[0]['trajectory'].poses))
             
-            return result
+            return results
             
         except Exception as e:
             logger.error(f"Inference failed: {e}")
@@ -233,19 +369,41 @@ class TrajectoryInferenceEngine:
                 logger.error(f"Feature devices: {[f'{k}: {v.device}' for k, v in features.items()]}")
             raise
     
+    @staticmethod
+    def _stack_feature(tensors: List[torch.Tensor], pin_memory: bool) -> torch.Tensor:
+        """
+        Stack per-sample feature tensors into a batch, optionally in pinned host memory
+        """
+        if not pin_memory:
+            return torch.stack(tensors)
+        out = torch.empty((len(tensors), *tensors[0].shape), dtype=tensors[0].dtype, pin_memory=True)
+        return torch.stack(tensors, out=out)
+    
     def get_sensor_config(self):
         """
         Get sensor configuration required for data loading
         """
         if self.agent is None:
             raise ValueError("Model not loaded. Call load_model() first.")
-        return self.agent.get_sensor_config()
+        return self._sensor_config
     
     def get_feature_builders(self):
         """Get feature builders from the agent"""
         if self.agent is None:
             raise ValueError("Model not loaded. Call load_model() first.")
-        return self.agent.get_feature_builders()
+        return self._feature_builders
+    
+    def unload_model(self):
+        """
+        Release the loaded model and the properties cached from it
+        """
+        self.agent = None
+        self._sensor_config = None
+        self._feature_builders = None
+        self._num_parameters = self._num_trainable_parameters = 0
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
+        logger.info("Model unloaded")
     
     def get_model_info(self) -> Dict[str, Any]:
         """
@@ -259,7 +417,7 @@ class TrajectoryInferenceEngine:
             "model_type": self.model_type,
             "checkpoint_path": self.checkpoint_path,
             "device": str(self.device),
-            "sensor_config": self.agent.get_sensor_config(),
-            "num_parameters": sum(p.numel() for p in self.agent.parameters()),
-            "trainable_parameters": sum(p.numel() for p in self.agent.parameters() if p.requires_grad)
+            "sensor_config": self._sensor_config,
+            "num_parameters": self._num_parameters,
+            "trainable_parameters": self._num_trainable_parameters
         } 
\ No newline at end of file
@@ -20,17 +20,15 @@ def test_data_structure_fixes():
     try:
         from navsim.common.dataclasses import EgoStatus, Frame, SceneMetadata
         
+        # __dataclass_fields__ 本身就是字典，直接做成员检查，不必先转成列表
         # 检查EgoStatus没有timestamp
-        ego_fields = list(EgoStatus.__dataclass_fields__.keys())
-        has_timestamp = 'timestamp' in ego_fields
+        has_timestamp = 'timestamp' in EgoStatus.__dataclass_fields__
         
         # 检查Frame有timestamp
-        frame_fields = list(Frame.__dataclass_fields__.keys())
-        frame_has_timestamp = 'timestamp' in frame_fields
+        frame_has_timestamp = 'timestamp' in Frame.__dataclass_fields__
         
         # 检查SceneMetadata没有scenario_type
-        metadata_fields = list(SceneMetadata.__dataclass_fields__.keys())
-        has_scenario_type = 'scenario_type' in metadata_fields
+        has_scenario_type = 'scenario_type' in SceneMetadata.__dataclass_fields__
         
         print(f"  ✅ EgoStatus 没有 timestamp: {not has_timestamp}")
         print(f"  ✅ Frame 有 timestamp: {frame_has_timestamp}")
@@ -63,10 +61,11 @@ def test_code_fixes():
         # 测试推理引擎修复
         from trajectory_app.inference_engine import TrajectoryInferenceEngine
         
-        ie_source = inspect.getsource(TrajectoryInferenceEngine.predict_trajectory)
+        # predict_trajectory delegates to the batched forward pass
+        ie_source = inspect.getsource(TrajectoryInferenceEngine.predict_trajectory_batch)
         
         ie_fixes = {
-            '设备转移修复': 'features = {k: v.to(self.device) for k, v in features.items()}' in ie_source,
+            '设备转移修复': 'features = {k: v.to(self.device, non_blocking=pin_memory) for k, v in features.items()}' in ie_source,
             'SOLUTION 1 注释': 'SOLUTION 1: Handle device mismatch' in ie_source,
             '设备日志': 'Model device:' in ie_source,
             '错误处理': 'except Exception as e:' in ie_source
@@ -75,7 +74,7 @@ def test_code_fixes():
         # 测试可视化器修复
         from trajectory_app.visualizer import TrajectoryVisualizer
         
-        viz_source = inspect.getsource(TrajectoryVisualizer._render_bev_trajectories)
+        viz_source = inspect.getsource(TrajectoryVisualizer._plot_trajectories_on_bev)
         
         viz_fixes = {
             'BEV坐标系修复': 'filtered_poses[i:i+2, 1]' in viz_source and 'filtered_poses[i:i+2, 0]' in viz_source,
@@ -20,6 +20,7 @@ from navsim.visualization.config import TRAJECTORY_CONFIG
 
 # Import feature visualizer
 from .feature_visualizer import FeatureVisualizer
+from .data_manager import calculate_trajectory_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -234,10 +235,29 @@ class TrajectoryVisualizer:
         # Create base BEV plot
         add_configured_bev_on_ax(ax, scene.map_api, scene.frames[frame_idx])
         
+        # Render each trajectory
+        self._plot_trajectories_on_bev(ax, trajectories, time_window)
+        
+        # Configure BEV view
+        self._finish_bev_ax(ax, trajectories)
+    
+    def _plot_trajectories_on_bev(
+        self,
+        ax: plt.Axes,
+        trajectories: Dict[str, Any],
+        time_window: Tuple[float, float]
+    ) -> List[Any]:
+        """
+        Plot the time-windowed trajectories on a BEV axis
+        
+        Returns:
+            List of the added artists, so callers can remove them again
+        """
+        artists = []
+        
         # Filter trajectories by time window
         time_start, time_end = time_window
         
-        # Render each trajectory
         for traj_name, traj_data in trajectories.items():
             if traj_name not in self.trajectory_styles:
                 continue
@@ -265,7 +285,7 @@ class TrajectoryVisualizer:
                 # 🔥 坐标系修复：NavSim BEV uses (Y, X) mapping
                 # X forward (vehicle direction) → matplotlib Y axis
                 # Y sideways (vehicle left) → matplotlib X axis  
-                ax.plot(
+                artists += ax.plot(
                     filtered_poses[i:i+2, 1],  # 轨迹 Y → matplotlib X
                     filtered_poses[i:i+2, 0],  # 轨迹 X → matplotlib Y
                     color=style["color"],
@@ -278,7 +298,7 @@ class TrajectoryVisualizer:
             marker_indices = np.linspace(0, len(filtered_poses)-1, 
                                        min(5, len(filtered_poses)), dtype=int)
             for idx in marker_indices:
-                ax.scatter(
+                artists.append(ax.scatter(
                     filtered_poses[idx, 1],  # 轨迹 Y → matplotlib X
                     filtered_poses[idx, 0],  # 轨迹 X → matplotlib Y
                     c=style["color"],
@@ -287,9 +307,14 @@ class TrajectoryVisualizer:
                     alpha=style["alpha"],
                     edgecolors='white',
                     linewidth=0.5
-                )
+                ))
         
-        # Configure BEV view
+        return artists
+    
+    def _finish_bev_ax(self, ax: plt.Axes, trajectories: Dict[str, Any]):
+        """
+        Configure the BEV view limits, legend and title
+        """
         configure_bev_ax(ax)
         
         # Add legend
@@ -582,10 +607,13 @@ class TrajectoryVisualizer:
         # Calculate trajectory metrics if we have ground truth and prediction
         metrics_text = ""
         if "ground_truth" in trajectories and "prediction" in trajectories:
-            metrics = self._calculate_trajectory_metrics(
-                trajectories["ground_truth"]["poses"],
-                trajectories["prediction"]["poses"]
-            )
+            if "position_errors" in trajectories["prediction"]:
+                metrics = calculate_trajectory_metrics(trajectories["prediction"]["position_errors"])
+            else:
+                metrics = self._calculate_trajectory_metrics(
+                    trajectories["ground_truth"]["poses"],
+                    trajectories["prediction"]["poses"]
+                )
             metrics_text = f"""
 Trajectory Metrics:
 • ADE: {metrics['ade']:.2f}m
@@ -638,27 +666,11 @@ Trajectory Details:"""
         """
         # Ensure same length for comparison
         min_length = min(len(gt_poses), len(pred_poses))
-        gt_poses = gt_poses[:min_length]
-        pred_poses = pred_poses[:min_length]
-        
-        if min_length == 0:
-            return {"ade": 0, "fde": 0, "max_error": 0, "rmse": 0}
         
         # Calculate position errors (ignore heading for now)
-        position_errors = np.linalg.norm(gt_poses[:, :2] - pred_poses[:, :2], axis=1)
-        
-        # Calculate metrics
-        ade = np.mean(position_errors)  # Average Displacement Error
-        fde = position_errors[-1]       # Final Displacement Error
-        max_error = np.max(position_errors)
-        rmse = np.sqrt(np.mean(position_errors**2))
-        
-        return {
-            "ade": ade,
-            "fde": fde, 
-            "max_error": max_error,
-            "rmse": rmse
-        }
+        position_errors = np.linalg.norm(gt_poses[:min_length, :2] - pred_poses[:min_length, :2], axis=1)
+        
+        return calculate_trajectory_metrics(position_errors)
     
     # New methods for feature visualization
     
@@ -825,10 +837,28 @@ Trajectory Details:"""
         Returns:
             matplotlib Figure object
         """
-        fig, ax = plt.subplots(1, 1, figsize=figsize)
+        fig, ax = self._create_simple_bev_base(scene_data, trajectories, figsize)
         
         # Render BEV trajectories
-        self._render_bev_trajectories(ax, scene_data, trajectories, time_window)
+        self._plot_trajectories_on_bev(ax, trajectories, time_window)
+        
+        return fig
+    
+    def _create_simple_bev_base(
+        self,
+        scene_data: Dict[str, Any],
+        trajectories: Dict[str, Any],
+        figsize: Tuple[int, int] = (10, 8)
+    ) -> Tuple[plt.Figure, plt.Axes]:
+        """
+        Create the time-independent part of the simple BEV plot (map, legend, title)
+        """
+        fig, ax = plt.subplots(1, 1, figsize=figsize)
+        
+        scene = scene_data["scene"]
+        frame_idx = scene.scene_metadata.num_history_frames - 1
+        add_configured_bev_on_ax(ax, scene.map_api, scene.frames[frame_idx])
+        self._finish_bev_ax(ax, trajectories)
         
         # Add title
         metadata = scene_data["metadata"]
@@ -838,8 +868,8 @@ Trajectory Details:"""
             fontsize=14, fontweight='bold'
         )
         
-        plt.tight_layout()
-        return fig
+        fig.tight_layout()
+        return fig, ax
     
     def export_animation_frames(
         self,
@@ -867,15 +897,23 @@ Trajectory Details:"""
         
         frame_paths = []
         
-        for i, time_window in enumerate(time_windows):
-            fig = self.create_simple_bev_plot(scene_data, trajectories, time_window)
-            
-            frame_path = output_dir / f"{frame_prefix}_{i:03d}.png"
-            fig.savefig(frame_path, dpi=150, bbox_inches='tight')
+        # The map, legend and title do not depend on the time window, so draw them
+        # once and only swap the trajectory artists between frames
+        fig, ax = self._create_simple_bev_base(scene_data, trajectories)
+        try:
+            for i, time_window in enumerate(time_windows):
+                artists = self._plot_trajectories_on_bev(ax, trajectories, time_window)
+                
+                frame_path = output_dir / f"{frame_prefix}_{i:03d}.png"
+                fig.savefig(frame_path, dpi=150, bbox_inches='tight')
+                
+                for artist in artists:
+                    artist.remove()
+                
+                frame_paths.append(frame_path)
+                logger.debug("Exported frame %d/%d: %s", i+1, len(time_windows), frame_path)
+        finally:
             plt.close(fig)
-            
-            frame_paths.append(frame_path)
-            logger.debug(f"Exported frame {i+1}/{len(time_windows)}: {frame_path}")
         
         logger.info(f"Exported {len(frame_paths)} animation frames to {output_dir}")
         return frame_paths 
\ No newline at end of file